@@ -1,14 +1,112 @@
 import streamlit as st
-import librosa
 import numpy as np
-import io
-from src.filters import lowpass_fir, highpass_fir, bandpass_fir, apply_filter
-from src.analysis import calculate_fft, calculate_filter_response, compute_spectrogram
+import pandas as pd
+import time
+from src.audio_io import (audio_info, load_segment, trim_margins, slice_with_margin, encode_audio,
+                          segment_bounds, ENCODINGS, SOUNDFILE_FORMATS)
+from src.analysis import (zoom_filter_response, find_cutoff_3db, compute_spectrogram,
+                          compute_spectrogram_approx, estimate_approx_error)
+from src.cache import RESULT_CACHE, audio_hash
+from src.engines import calibrate_in_background
+from src.jobs import JOB_EXECUTOR
+from src.pipeline import cached_analysis, F_MAX, NPERSEG
+from src.store import default_store
+from src.preview import preview_analysis
+from src.profiling import profile_pipeline
 
-import matplotlib.pyplot as plt
-import soundfile as sf
 from io import BytesIO
 
+FILTER_TYPES = {"Paso bajo": 'lowpass', "Paso alto": 'highpass', "Paso banda": 'bandpass'}
+
+# Almacén en disco: los resultados sobreviven a reinicios de la app
+ANALYSIS_STORE = st.cache_resource(default_store)()
+
+# Calibración de motores en segundo plano, una vez por proceso (si falta la tabla)
+st.cache_resource(calibrate_in_background)()
+
+
+# Máximo del control de num_taps: los fragmentos se decodifican una vez con el
+# contexto que necesita el filtro más largo y se recortan para los demás
+MAX_NUM_TAPS = 501
+
+
+def reads_by_fragment(input_format):
+    """True si soundfile lee el formato por fragmentos (seek), sin decodificar todo."""
+    return input_format is None or input_format.lower() in SOUNDFILE_FORMATS
+
+
+def decoded_audio_cached(audio_bytes, audio_key, input_format=None):
+    """
+    Decodifica el archivo completo una sola vez por contenido. Solo para los
+    formatos que no se pueden leer por fragmentos (MP3, vía librosa).
+    """
+    def decode():
+        y, sr, _ = load_segment(BytesIO(audio_bytes), format=input_format)
+        return {'y': y, 'sr': sr}
+    return RESULT_CACHE.get_or_compute(('audio', audio_key), decode)
+
+
+def audio_info_cached(audio_bytes, audio_key, input_format=None):
+    """Frecuencia de muestreo y muestras del audio (solo la cabecera con soundfile)."""
+    def read_info():
+        if not reads_by_fragment(input_format):
+            audio = decoded_audio_cached(audio_bytes, audio_key, input_format)
+            return {'sr': audio['sr'], 'frames': len(audio['y'])}
+        sr, frames = audio_info(BytesIO(audio_bytes), format=input_format)
+        return {'sr': sr, 'frames': frames}
+    return RESULT_CACHE.get_or_compute(('info', audio_key), read_info)
+
+
+def load_segment_cached(audio_bytes, audio_key, segment, margin, input_format=None):
+    """
+    Fragmento segment = (a, b) en muestras con margin muestras de contexto.
+    Se decodifica una sola vez por contenido y rango (compartido entre
+    sesiones), con el contexto de MAX_NUM_TAPS, y se recorta al margin pedido:
+    mover el control de num_taps no vuelve a decodificar.
+    """
+    if not reads_by_fragment(input_format):
+        audio = decoded_audio_cached(audio_bytes, audio_key, input_format)
+        y_context, margins = slice_with_margin(audio['y'], *segment, margin)
+        return {'y': y_context, 'margins': margins}
+
+    def decode():
+        sr = audio_info_cached(audio_bytes, audio_key, input_format)['sr']
+        y_context, _, margins = load_segment(BytesIO(audio_bytes), segment[0] / sr, segment[1] / sr,
+                                             MAX_NUM_TAPS // 2, format=input_format)
+        return {'y': y_context, 'margins': margins}
+    audio = RESULT_CACHE.get_or_compute(('fragmento', audio_key, segment), decode)
+    before, after = audio['margins']
+    y_context, margins = slice_with_margin(audio['y'], before, len(audio['y']) - after, margin)
+    return {'y': y_context, 'margins': margins}
+
+
+def compute_result(audio_bytes, result_key, input_format=None):
+    """Retorna el análisis descrito por result_key desde la caché (o lo recalcula)."""
+    _, audio_key, filter_type, cutoffs, num_taps, segment = result_key
+
+    def compute():
+        sr = audio_info_cached(audio_bytes, audio_key, input_format)['sr']
+        audio = load_segment_cached(audio_bytes, audio_key, segment, num_taps // 2, input_format)
+        return cached_analysis(ANALYSIS_STORE, audio_key, audio['y'], sr,
+                               FILTER_TYPES[filter_type], cutoffs, num_taps,
+                               margins=audio['margins'], segment=segment)
+
+    return RESULT_CACHE.get_or_compute(result_key, compute)
+
+
+def encoded_audio(cache_key, signal, sr, audio_format):
+    """Codifica la señal una sola vez por (clave, formato) y reutiliza los bytes."""
+    return RESULT_CACHE.get_or_compute(('codificado', cache_key, audio_format),
+                                       lambda: encode_audio(signal, sr, audio_format))
+
+
+def show_result(meta):
+    """Pasa a mostrar el resultado descrito por meta (solo se guardan claves y parámetros)."""
+    for name, value in meta.items():
+        if name != 'job_id':
+            st.session_state[name] = value
+    st.session_state.pop('pending', None)
+
 
 st.set_page_config(
     page_title="Analizador Espectral FIR",
@@ -30,14 +128,22 @@ uploaded_file = st.sidebar.file_uploader(
 if uploaded_file is not None:
     st.sidebar.success("Archivo cargado!")
     
-    audio_bytes = uploaded_file.read()
-    y, sr = librosa.load(io.BytesIO(audio_bytes), sr=None)
+    audio_bytes = uploaded_file.getvalue()
+    audio_key = audio_hash(audio_bytes)
+    input_format = uploaded_file.name.rsplit('.', 1)[-1]
+    # Solo la cabecera: se decodifica después únicamente el fragmento elegido
+    try:
+        info = audio_info_cached(audio_bytes, audio_key, input_format)
+    except ValueError as e:
+        st.error(f"Error: {e}")
+        st.stop()
+    sr, num_samples = info['sr'], info['frames']
     
     st.sidebar.info(f"""
     **Información del audio:**
     - Frecuencia de muestreo: {sr} Hz
-    - Duración: {len(y)/sr:.2f} segundos
-    - Muestras: {len(y):,}
+    - Duración: {num_samples/sr:.2f} segundos
+    - Muestras: {num_samples:,}
     """)
     
     st.sidebar.subheader("👇", text_alignment="center")
@@ -57,14 +163,14 @@ if uploaded_file is not None:
         fc_low = st.sidebar.slider(
             "Frecuencia de corte inferior (Hz)",
             min_value=100,
-            max_value=int(sr//2) - 100,
+            max_value=int(sr//2) - 200,
             value=1000,
             step=100,
         )
         fc_high = st.sidebar.slider(
             "Frecuencia de corte superior (Hz)",
             min_value=fc_low + 100,
-            max_value=int(sr//2),
+            max_value=int(sr//2) - 100,
             value=3000,
             step=100,
             help="Frecuencia hasta donde pasa"
@@ -73,7 +179,7 @@ if uploaded_file is not None:
         fc = st.sidebar.slider(
             "Frecuencia de corte (Hz)",
             min_value=100,
-            max_value=int(sr//2),
+            max_value=int(sr//2) - 100,
             value=3000,
             step=100,
             help="Frecuencia de corte del filtro"
@@ -82,50 +188,165 @@ if uploaded_file is not None:
     num_taps = st.sidebar.slider(
         "Número de coeficientes (num_taps)",
         min_value=51,
-        max_value=501,
+        max_value=MAX_NUM_TAPS,
         value=101,
         step=50,
         help="Longitud del filtro. Mayor = más preciso"
     )
     
+    duration = num_samples / sr
+    time_range = st.sidebar.slider(
+        "Rango de tiempo (s)",
+        min_value=0.0,
+        max_value=float(duration),
+        value=(0.0, float(duration)),
+        step=0.1,
+        help="Solo se filtra y analiza este fragmento"
+    )
+    
+    # Fragmento a analizar y contexto para que el filtrado coincida con el del archivo completo
+    try:
+        # La STFT del análisis completo necesita al menos NPERSEG muestras
+        segment = segment_bounds(num_samples, sr, *time_range, min_samples=NPERSEG)
+    except ValueError as e:
+        st.error(f"Error: {e}")
+        st.stop()
+    audio = load_segment_cached(audio_bytes, audio_key, segment, num_taps // 2, input_format)
+    y_context, margins = audio['y'], audio['margins']
+    y = trim_margins(y_context, margins)
+    
+    audio_format = st.sidebar.selectbox(
+        "Formato de audio (reproducción y descarga)",
+        list(ENCODINGS),
+        format_func=str.upper,
+        help="FLAC es sin pérdida y más liviano que WAV; OGG (Vorbis) es el más liviano"
+    )
+    mime = ENCODINGS[audio_format][2]
+    
     st.sidebar.markdown("---")
     analyze_button = st.sidebar.button("Analizar", icon="🔍", type="secondary", use_container_width=True)
+    auto_refine = st.sidebar.checkbox(
+        "Refinar automáticamente",
+        value=False,
+        help="Lanza el análisis completo en segundo plano cada vez que cambian los parámetros"
+    )
+    profile_memory = st.sidebar.checkbox(
+        "Perfil de memoria",
+        value=False,
+        help="Mide la memoria de cada etapa (decodificación → gráficos) sin cachés, con tracemalloc. "
+             "Es lento: solo para diagnóstico"
+    )
     
-    if analyze_button:
-        with st.spinner("Procesando audio..."):
-            
-            # Diseñar filtro según tipo
-            if filter_type == "Paso bajo":
-                h = lowpass_fir(fc=fc, fs=sr, num_taps=num_taps)
-                filter_name = f"Paso bajo (fc={fc} Hz)"
-            elif filter_type == "Paso alto":
-                h = highpass_fir(fc=fc, fs=sr, num_taps=num_taps)
-                filter_name = f"Paso alto (fc={fc} Hz)"
+    # Parámetros actuales
+    if filter_type == "Paso banda":
+        cutoffs = (fc_low, fc_high)
+        meta = {'filter_name': f"Paso banda ({fc_low}-{fc_high} Hz)", 'fc_low': fc_low, 'fc_high': fc_high}
+    else:
+        cutoffs = (fc,)
+        meta = {'filter_name': f"{filter_type} (fc={fc} Hz)", 'fc': fc}
+    current_key = ('resultado', audio_key, filter_type, cutoffs, num_taps, segment)
+    meta.update(result_key=current_key, filter_type=filter_type)
+    
+    # Si cambiaron los parámetros, el análisis en curso quedó obsoleto
+    pending = st.session_state.get('pending')
+    if pending is not None and pending['result_key'] != current_key:
+        JOB_EXECUTOR.cancel(pending['job_id'])
+        del st.session_state.pending
+        st.sidebar.warning("Análisis anterior cancelado: cambiaron los parámetros")
+    
+    if analyze_button or (auto_refine and st.session_state.get('result_key') != current_key):
+        if filter_type == "Paso banda" and fc_low >= fc_high:
+            st.error("Error: la frecuencia inferior de corte debe ser menor a la frecuencia superior")
+            st.stop()
+        
+        if current_key in RESULT_CACHE:
+            show_result(meta)
+        elif 'pending' not in st.session_state:
+            # El análisis corre en segundo plano; se recoge en las próximas ejecuciones
+            job = JOB_EXECUTOR.submit(current_key, cached_analysis, ANALYSIS_STORE, audio_key, y_context, sr,
+                                      FILTER_TYPES[filter_type], cutoffs, num_taps,
+                                      margins=margins, segment=segment)
+            st.session_state.pending = dict(meta, job_id=job.id)
+    
+    poll = False
+    pending = st.session_state.get('pending')
+    if pending is not None:
+        job = JOB_EXECUTOR.get(pending['job_id'])
+        if job is None:
+            # Otra sesión con los mismos parámetros ya recogió el resultado (o se
+            # descartó por quedar sin recoger demasiado tiempo: se recalcula)
+            if pending['result_key'] in RESULT_CACHE:
+                show_result(pending)
             else:
-                h = bandpass_fir(fc_low=fc_low, fc_high=fc_high, fs=sr, num_taps=num_taps)
-                filter_name = f"Paso banda ({fc_low}-{fc_high} Hz)"
-
-            if h is None:
-                st.error("Error: la frecuencia inferior de corte debe ser menor a la frecuencia superior")
-                st.stop()
-
-            y_filtered = apply_filter(y, h)
-            
-            # Guardar en session_state para usar después
-            st.session_state.y = y
-            st.session_state.y_filtered = y_filtered
-            st.session_state.sr = sr
-            st.session_state.h = h
-            st.session_state.filter_name = filter_name
-            st.session_state.filter_type = filter_type
-            if filter_type == "Paso banda":
-                st.session_state.fc_low = fc_low
-                st.session_state.fc_high = fc_high
+                job = JOB_EXECUTOR.submit(current_key, cached_analysis, ANALYSIS_STORE, audio_key, y_context, sr,
+                                          FILTER_TYPES[filter_type], cutoffs, num_taps,
+                                          margins=margins, segment=segment)
+                st.session_state.pending = dict(meta, job_id=job.id)
+                poll = True
+        elif job.status == 'done':
+            RESULT_CACHE.put(pending['result_key'], job.result())
+            JOB_EXECUTOR.pop(job.id)
+            show_result(pending)
+            st.sidebar.success("Análisis completado!")
+        elif job.status == 'error':
+            JOB_EXECUTOR.pop(job.id)
+            del st.session_state.pending
+            st.error(f"Error en el análisis: {job.error()}")
+        elif job.status == 'cancelled':
+            del st.session_state.pending
+        else:
+            st.sidebar.progress(job.progress, text=f"Procesando audio... ({job.stage})")
+            if st.sidebar.button("Cancelar análisis", use_container_width=True):
+                JOB_EXECUTOR.cancel(job.id)
+                del st.session_state.pending
             else:
-                st.session_state.fc = fc
-            
-            st.success("Análisis completado!")
-            st.rerun()
+                poll = True
+
+    # Perfil de memoria: se mide una vez por combinación de parámetros
+    if profile_memory:
+        st.markdown("---")
+        st.subheader("Perfil de memoria por etapa")
+        profile = st.session_state.get('memory_profile')
+        if profile is None or profile['key'] != current_key:
+            with st.spinner("Midiendo la memoria de cada etapa..."):
+                profiler = profile_pipeline(BytesIO(audio_bytes), FILTER_TYPES[filter_type], cutoffs,
+                                            num_taps, *time_range, format=input_format)
+            profile = {'key': current_key, 'rows': profiler.rows(), 'report': profiler.report()}
+            st.session_state.memory_profile = profile
+        st.dataframe(pd.DataFrame(profile['rows']), hide_index=True, use_container_width=True)
+        st.caption("Pico: memoria máxima por encima del inicio de la etapa. Transitorio: la parte "
+                   "que se libera antes de terminar. Total pico: incluye lo retenido de etapas anteriores. "
+                   "Los picos incluyen lo que asignen otros hilos del proceso (por ejemplo, "
+                   "análisis en segundo plano de otras sesiones).")
+        with st.expander("Reporte completo (líneas que más memoria retienen y arrays vivos)"):
+            st.code(profile['report'])
+    
+    # Vista previa de baja resolución mientras los parámetros no coinciden con el resultado mostrado
+    if st.session_state.get('result_key') != current_key:
+        preview = RESULT_CACHE.get_or_compute(
+            ('vista previa',) + current_key[1:],
+            lambda: preview_analysis(y, sr, FILTER_TYPES[filter_type], cutoffs, num_taps))
+        
+        st.markdown("---")
+        st.subheader("Vista previa (fragmento de 3 s, baja resolución)")
+        st.caption(f"Calculada en {preview['elapsed'] * 1000:.0f} ms. "
+                   "Presioná 'Analizar' para el análisis completo.")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Respuesta en frecuencia H(f)**")
+            freqs_preview, mag_preview_db = preview['response']
+            st.line_chart(pd.DataFrame({'Frecuencia (Hz)': freqs_preview,
+                                        'Ganancia (dB)': np.maximum(mag_preview_db, -80)}),
+                          x='Frecuencia (Hz)', y='Ganancia (dB)')
+        with col2:
+            st.markdown("**Espectro (Welch)**")
+            freqs_preview, psd_orig_db, psd_filt_db = preview['spectrum']
+            visible = freqs_preview <= 10000
+            st.line_chart(pd.DataFrame({'Frecuencia (Hz)': freqs_preview[visible],
+                                        'Original (dB)': psd_orig_db[visible],
+                                        'Filtrado (dB)': psd_filt_db[visible]}),
+                          x='Frecuencia (Hz)', y=['Original (dB)', 'Filtrado (dB)'])
 
 else:
     st.markdown("---")
@@ -133,15 +354,22 @@ else:
     st.stop()
 
 # Si ya se analizó, muestro resultados
-if 'y_filtered' in st.session_state:
+if st.session_state.get('result_key', (None, None))[1] == audio_key:
+    # matplotlib se importa recién cuando hay resultados para graficar
+    import matplotlib.pyplot as plt
+    
     st.markdown("---")
     st.header("Resultados del Análisis")
     
-    # Recuperar datos del session_state
-    y = st.session_state.y
-    y_filtered = st.session_state.y_filtered
-    sr = st.session_state.sr
-    h = st.session_state.h
+    # Recuperar datos de la caché compartida (se recalculan si fueron desalojados)
+    result = compute_result(audio_bytes, st.session_state.result_key, input_format)
+    segment, result_taps = st.session_state.result_key[5], st.session_state.result_key[4]
+    audio = load_segment_cached(audio_bytes, audio_key, segment, result_taps // 2, input_format)
+    y = trim_margins(audio['y'], audio['margins'])
+    y_filtered = result['y_filtered']
+    h = result['h']
+    freqs_orig, mag_orig_db, mag_filt_db = result['fft']
+    times_spec, freqs_spec, Sxx_orig_db, Sxx_filt_db = result['spectrogram']
     filter_name = st.session_state.filter_name
     filter_type = st.session_state.filter_type
     
@@ -162,10 +390,8 @@ if 'y_filtered' in st.session_state:
         
         with col1:
             st.markdown("**Original**")
-            buffer_orig = BytesIO()
-            sf.write(buffer_orig, y, sr, format='WAV')
-            buffer_orig.seek(0)
-            st.audio(buffer_orig, format='audio/wav')
+            audio_orig = encoded_audio((audio_key, segment), y, sr, audio_format)
+            st.audio(audio_orig, format=mime)
 
             fig, ax = plt.subplots(figsize=(10, 3))
             tiempo = np.linspace(0, len(y)/sr, len(y))
@@ -179,10 +405,8 @@ if 'y_filtered' in st.session_state:
         
         with col2:
             st.markdown(f"**Filtrado - {filter_name}**")
-            buffer_filt = BytesIO()
-            sf.write(buffer_filt, y_filtered, sr, format='WAV')
-            buffer_filt.seek(0)
-            st.audio(buffer_filt, format='audio/wav')
+            audio_filt = encoded_audio(st.session_state.result_key, y_filtered, sr, audio_format)
+            st.audio(audio_filt, format=mime)
 
             fig, ax = plt.subplots(figsize=(10, 3))
             ax.plot(tiempo, y_filtered, linewidth=0.5, color='orange')
@@ -218,11 +442,11 @@ if 'y_filtered' in st.session_state:
         
         # Respuesta en frecuencia
         st.markdown("**Respuesta en frecuencia H(f)**")
-        freqs_filter, mag_filter_db = calculate_filter_response(h, sr)
-        idx_max = np.where(freqs_filter >= 10000)[0][0]
+        f_max_filter = min(10000, sr / 2)
+        freqs_filter, mag_filter_db = zoom_filter_response(h, sr, 0, f_max_filter, num_points=2048)
         
         fig, ax = plt.subplots(figsize=(12, 5))
-        ax.plot(freqs_filter[1:idx_max], mag_filter_db[1:idx_max], linewidth=2)
+        ax.plot(freqs_filter, mag_filter_db, linewidth=2)
         
         # Marcar frecuencias de corte según tipo de filtro
         if filter_type == "Paso banda":
@@ -232,10 +456,12 @@ if 'y_filtered' in st.session_state:
                       label=f'fc_low = {fc_low} Hz')
             ax.axvline(x=fc_high, color='red', linestyle='--', 
                       label=f'fc_high = {fc_high} Hz')
+            cutoffs = [find_cutoff_3db(h, sr, fc_low), find_cutoff_3db(h, sr, fc_high)]
         else:
             fc = st.session_state.fc
             ax.axvline(x=fc, color='red', linestyle='--', 
                       label=f'fc = {fc} Hz')
+            cutoffs = [find_cutoff_3db(h, sr, fc)]
         
         ax.axhline(y=-3, color='gray', linestyle=':', label='-3 dB', alpha=0.5)
         ax.set_xlabel('Frecuencia (Hz)')
@@ -244,9 +470,13 @@ if 'y_filtered' in st.session_state:
         ax.grid(True, alpha=0.3)
         ax.legend()
         ax.set_ylim(-80, 5)
-        ax.set_xlim(0, 10000)
+        ax.set_xlim(0, f_max_filter)
         st.pyplot(fig)
         plt.close()
+        
+        cutoffs_text = ", ".join(f"{f:.1f} Hz" for f in cutoffs if f is not None)
+        if cutoffs_text:
+            st.caption(f"Punto de -3 dB medido: {cutoffs_text}")
     
     # ============================================
     # Análisis Espectral (FFT)
@@ -254,10 +484,6 @@ if 'y_filtered' in st.session_state:
     with tab3:
         st.subheader("Comparación espectral (FFT)")
         
-        # Calcular FFT
-        freqs_orig, _, mag_orig_db = calculate_fft(y, sr)
-        freqs_filt, _, mag_filt_db = calculate_fft(y_filtered, sr)
-        
         idx_max = np.where(freqs_orig >= 10000)[0][0]
         
         # Gráfico de comparación
@@ -266,7 +492,7 @@ if 'y_filtered' in st.session_state:
         # Espectros superpuestos
         axes[0].plot(freqs_orig[1:idx_max], mag_orig_db[1:idx_max],
                     alpha=0.7, label='Original', linewidth=1.5)
-        axes[0].plot(freqs_filt[1:idx_max], mag_filt_db[1:idx_max],
+        axes[0].plot(freqs_orig[1:idx_max], mag_filt_db[1:idx_max],
                     alpha=0.7, label='Filtrado', linewidth=1.5)
         
         # Marcar frecuencias de corte
@@ -310,9 +536,25 @@ if 'y_filtered' in st.session_state:
     with tab4:
         st.subheader("Espectrogramas (análisis tiempo-frecuencia)")
         
-        # Calcular espectrogramas
-        times_orig, freqs_spec, _, Sxx_orig_db = compute_spectrogram(y, sr)
-        times_filt, _, _, Sxx_filt_db = compute_spectrogram(y_filtered, sr)
+        approx_mode = st.checkbox(
+            "Modo aproximado (una sola STFT)",
+            value=False,
+            help="Deriva el espectrograma filtrado del original escalado por |H(f)|²"
+        )
+        
+        # Los espectrogramas exactos ya vienen calculados en el resultado; el
+        # aproximado se calcula una sola vez por resultado (no en cada rerun)
+        if approx_mode:
+            def approx_spectrograms():
+                times, freqs, Sxx_orig, Sxx_orig_db = compute_spectrogram(y, sr, f_max=F_MAX)
+                _, Sxx_filt_db = compute_spectrogram_approx(freqs, Sxx_orig, h, sr)
+                return times, freqs, Sxx_orig_db, Sxx_filt_db, estimate_approx_error(y, sr, h)
+            
+            (times_spec, freqs_spec, Sxx_orig_db, Sxx_filt_db,
+             (rel_error, max_error_db)) = RESULT_CACHE.get_or_compute(
+                ('aproximado',) + st.session_state.result_key[1:], approx_spectrograms)
+            st.caption(f"Error medido de la aproximación: {rel_error:.2e} relativo, "
+                       f"{max_error_db:.2f} dB máximo")
         
         # Limitar a 10kHz
         idx_freq = np.where(freqs_spec <= 10000)[0]
@@ -324,7 +566,7 @@ if 'y_filtered' in st.session_state:
         fig, axes = plt.subplots(2, 1, figsize=(14, 10))
         
         # Original
-        im1 = axes[0].pcolormesh(times_orig, freqs_spec[idx_freq], 
+        im1 = axes[0].pcolormesh(times_spec, freqs_spec[idx_freq], 
                                  Sxx_orig_db[idx_freq, :],
                                  shading='gouraud', cmap='viridis', 
                                  vmin=vmin, vmax=vmax)
@@ -334,7 +576,7 @@ if 'y_filtered' in st.session_state:
         fig.colorbar(im1, ax=axes[0], label='Magnitud (dB)')
         
         # Filtrado
-        im2 = axes[1].pcolormesh(times_filt, freqs_spec[idx_freq], 
+        im2 = axes[1].pcolormesh(times_spec, freqs_spec[idx_freq], 
                                  Sxx_filt_db[idx_freq, :],
                                  shading='gouraud', cmap='viridis', 
                                  vmin=vmin, vmax=vmax)
@@ -373,41 +615,37 @@ if 'y_filtered' in st.session_state:
     with col1:
         st.markdown("**Audio original**")
         
-        # Preparar archivo para descarga
-        buffer_orig_download = BytesIO()
-        sf.write(buffer_orig_download, y, sr, format='WAV')
-        buffer_orig_download.seek(0)
-        
+        # Se reutilizan los bytes ya codificados para el reproductor
         st.download_button(
-            label="Descargar original (.wav)",
-            data=buffer_orig_download,
-            file_name="audio_original.wav",
-            mime="audio/wav",
+            label=f"Descargar original (.{audio_format})",
+            data=audio_orig,
+            file_name=f"audio_original.{audio_format}",
+            mime=mime,
             use_container_width=True
         )
     
     with col2:
         st.markdown(f"**Audio filtrado - {filter_name}**")
         
-        # Preparar archivo para descarga
-        buffer_filt_download = BytesIO()
-        sf.write(buffer_filt_download, y_filtered, sr, format='WAV')
-        buffer_filt_download.seek(0)
-        
         # Generar nombre de archivo descriptivo
         if filter_type == "Paso banda":
-            filename = f"{original_filename}_{fc_low}-{fc_high}Hz.wav"
+            filename = f"{original_filename}_{fc_low}-{fc_high}Hz.{audio_format}"
         else:
             filter_prefix = "lowpass" if filter_type == "Paso bajo" else "highpass"
-            filename = f"{original_filename}_{filter_prefix}_{fc}Hz.wav"
+            filename = f"{original_filename}_{filter_prefix}_{fc}Hz.{audio_format}"
         
         st.download_button(
-            label="Descargar filtrado (.wav)",
-            data=buffer_filt_download,
+            label=f"Descargar filtrado (.{audio_format})",
+            data=audio_filt,
             file_name=filename,
-            mime="audio/wav",
+            mime=mime,
             use_container_width=True
         )
 else:
     st.markdown("---")
-    st.info("Presiona el botón 'Analizar' para ver los resultados")
\ No newline at end of file
+    st.info("Presiona el botón 'Analizar' para ver los resultados")
+
+# Mientras haya un análisis en segundo plano, se vuelve a ejecutar el script para actualizar el progreso
+if poll:
+    time.sleep(0.5)
+    st.rerun()
\ No newline at end of file
@@ -1,54 +1,142 @@
-import librosa
-from src.filters import lowpass_fir, highpass_fir, apply_filter
+import argparse
+import functools
+
+import numpy as np
+from src.audio_io import load_segment, trim_margins
+from src.filters import lowpass_fir, highpass_fir, apply_filter_segment
 from src.analysis import calculate_fft
 from src.visualization import (plot_audio_effects_comparison, plot_spectrograms_comparison, plot_waveform, plot_filters_comparison)
-from src.analysis import compute_spectrogram
+from src.analysis import (compute_spectrogram, compute_spectrogram_approx, estimate_approx_error,
+                          compute_spectrograms_batch)
+from src.cache import file_key
+from src.store import default_store, store_key
+from src.stats import SignalStats, print_summary
+from src.profiling import MemoryProfiler
 
 # Configuración
 AUDIO_PATH = 'audio_samples/sample-15s.wav'
 CUTOFF_FREQ = 3000  # Hz
 NUM_TAPS = 101
+START_TIME = None  # Inicio del fragmento a procesar (s); None = desde el principio
+END_TIME = None    # Fin del fragmento a procesar (s); None = hasta el final
+SPECTROGRAM_MODE = 'exact'  # 'exact' (STFT en lote) o 'approx' (una sola STFT + |H(f)|²)
+NPERSEG = 2048
+FFT_F_MAX = 5000           # Banda que muestran los gráficos de espectro (se decima antes de la FFT)
+SPECTROGRAM_F_MAX = 10000  # Banda que muestran los espectrogramas
+USE_STORE = True  # Reutilizar resultados guardados en disco entre ejecuciones
+
+parser = argparse.ArgumentParser(description="Análisis espectral con filtros FIR")
+parser.add_argument('--profile-memory', action='store_true',
+                    help="Medir la memoria de cada etapa con tracemalloc (sin usar el almacén en disco)")
+args = parser.parse_args()
+PROFILER = MemoryProfiler(enabled=args.profile_memory)
+
+
+def cached(name, params, compute):
+    """Busca el resultado en el almacén en disco; si no está, lo calcula y lo guarda."""
+    if STORE is None:
+        return compute()
+    return STORE.get_or_compute(store_key(name, audio_key, START_TIME, END_TIME, *params), compute)
+
 
 # Cargar audio
 print("Cargando audio...")
-y, sr = librosa.load(AUDIO_PATH, sr=None)
+with PROFILER.stage('decodificación'):
+    # Solo se decodifica el fragmento pedido, con el contexto que necesita el filtro
+    y_context, sr, margins = load_segment(AUDIO_PATH, START_TIME, END_TIME, margin=NUM_TAPS // 2)
+    y = PROFILER.track('y', trim_margins(y_context, margins))
+PROFILER.set_signal(len(y), sr)
+# Ruta, tamaño y fecha de modificación: hashear el contenido leería el archivo
+# completo aunque solo se procese un fragmento
+audio_key = file_key(AUDIO_PATH)
+# Al medir memoria se calcula todo: un resultado guardado no mediría nada
+STORE = default_store() if USE_STORE and not PROFILER.enabled else None
 print(f"Frecuencia de muestreo: {sr} Hz")
 print(f"Duración: {len(y)/sr:.2f} segundos")
 print(f"Muestras: {len(y)}")
 
 # Visualizar señal original
-plot_waveform(y, sr, title="Señal original")
+with PROFILER.stage('gráficos'):
+    plot_waveform(y, sr, title="Señal original")
 
 # Diseñar filtros
 print(f"\nDiseñando filtros (fc={CUTOFF_FREQ} Hz)...")
-h_low = lowpass_fir(fc=CUTOFF_FREQ, fs=sr, num_taps=NUM_TAPS)
-h_high = highpass_fir(fc=CUTOFF_FREQ, fs=sr, num_taps=NUM_TAPS)
+with PROFILER.stage('diseño'):
+    h_low = lowpass_fir(fc=CUTOFF_FREQ, fs=sr, num_taps=NUM_TAPS)
+    h_high = highpass_fir(fc=CUTOFF_FREQ, fs=sr, num_taps=NUM_TAPS)
 print(f"Filtros creados con {len(h_low)} coeficientes")
 
 # Comparación de filtros
-plot_filters_comparison(h_low, h_high, fc=CUTOFF_FREQ, sr=sr)
+with PROFILER.stage('gráficos'):
+    plot_filters_comparison(h_low, h_high, fc=CUTOFF_FREQ, sr=sr)
+
+# Aplicar filtros (solo se calculan si algún resultado no está guardado)
+low_params = ('lowpass', CUTOFF_FREQ, NUM_TAPS)
+high_params = ('highpass', CUTOFF_FREQ, NUM_TAPS)
 
-# Aplicar filtros
-print("\nAplicando filtros...")
-y_lowpass = apply_filter(y, h_low)
-y_highpass = apply_filter(y, h_high)
+@functools.cache
+def filtered_lowpass():
+    return cached('filtrado', low_params, lambda: apply_filter_segment(y_context, h_low, margins))
+
+@functools.cache
+def filtered_highpass():
+    return cached('filtrado', high_params, lambda: apply_filter_segment(y_context, h_high, margins))
+
+if PROFILER.enabled:
+    # Sin almacén las señales filtradas se calculan igual: se miden en su propia etapa
+    with PROFILER.stage('filtrado'):
+        PROFILER.track('y paso bajo', filtered_lowpass())
+        PROFILER.track('y paso alto', filtered_highpass())
+
+# Estadísticas de control de calidad, con las mismas señales filtradas (sin otra pasada por el archivo)
+stats_orig = SignalStats(sr).update(y)
+for name, filtered in (("paso bajo", filtered_lowpass), ("paso alto", filtered_highpass)):
+    print(f"\nEstadísticas {name}:")
+    print_summary(stats_orig, SignalStats(sr).update(filtered()))
 
 # Análisis espectral
 print("\nCalculando espectros...")
-freqs_orig, _, mag_orig_db = calculate_fft(y, sr)
-_, _, mag_low_db = calculate_fft(y_lowpass, sr)
-_, _, mag_high_db = calculate_fft(y_highpass, sr)
+with PROFILER.stage('fft'):
+    freqs_orig, mag_orig_db = PROFILER.track('fft original', cached(
+        'fft', ('original', FFT_F_MAX), lambda: calculate_fft(y, sr, FFT_F_MAX)[::2]))
+    _, mag_low_db = PROFILER.track('fft paso bajo', cached(
+        'fft', low_params + (FFT_F_MAX,), lambda: calculate_fft(filtered_lowpass(), sr, FFT_F_MAX)[::2]))
+    _, mag_high_db = PROFILER.track('fft paso alto', cached(
+        'fft', high_params + (FFT_F_MAX,), lambda: calculate_fft(filtered_highpass(), sr, FFT_F_MAX)[::2]))
 
 # Comparación espectral de filtros
-plot_audio_effects_comparison(freqs_orig, mag_orig_db, mag_low_db, 
-                              mag_high_db, fc=CUTOFF_FREQ)
+with PROFILER.stage('gráficos'):
+    plot_audio_effects_comparison(freqs_orig, mag_orig_db, mag_low_db,
+                                  mag_high_db, fc=CUTOFF_FREQ)
 
 # STFT - Espectrogramas
 print("\nCalculando espectrogramas...")
 
-times, freqs_spec, _, Sxx_orig_db = compute_spectrogram(y, sr)
-_, _, _, Sxx_low_db = compute_spectrogram(y_lowpass, sr)
-_, _, _, Sxx_high_db = compute_spectrogram(y_highpass, sr)
+def spectrograms():
+    if SPECTROGRAM_MODE == 'approx':
+        times, freqs_spec, Sxx_orig, Sxx_orig_db = compute_spectrogram(y, sr, NPERSEG, f_max=SPECTROGRAM_F_MAX)
+        _, Sxx_low_db = compute_spectrogram_approx(freqs_spec, Sxx_orig, h_low, sr)
+        _, Sxx_high_db = compute_spectrogram_approx(freqs_spec, Sxx_orig, h_high, sr)
+        for name, h in (("paso bajo", h_low), ("paso alto", h_high)):
+            rel_error, max_error_db = estimate_approx_error(y, sr, h, NPERSEG)
+            print(f"Aproximación {name}: error relativo {rel_error:.2e}, "
+                  f"error máximo {max_error_db:.2f} dB")
+        return times, freqs_spec, Sxx_orig_db, Sxx_low_db, Sxx_high_db
+    
+    times, freqs_spec, _, Sxx_db = compute_spectrograms_batch(
+        np.stack([y, filtered_lowpass(), filtered_highpass()]), sr, NPERSEG, keep_power=False,
+        f_max=SPECTROGRAM_F_MAX)
+    return (times, freqs_spec) + tuple(Sxx_db)
+
+with PROFILER.stage('stft'):
+    times, freqs_spec, Sxx_orig_db, Sxx_low_db, Sxx_high_db = PROFILER.track('espectrogramas', cached(
+        'espectrogramas', (CUTOFF_FREQ, NUM_TAPS, SPECTROGRAM_MODE, NPERSEG, SPECTROGRAM_F_MAX),
+        spectrograms))
+
+with PROFILER.stage('gráficos'):
+    plot_spectrograms_comparison(times, freqs_spec, Sxx_orig_db, Sxx_low_db,
+                                 Sxx_high_db, fc=CUTOFF_FREQ)
 
-plot_spectrograms_comparison(times, freqs_spec, Sxx_orig_db, Sxx_low_db,
-                            Sxx_high_db, fc=CUTOFF_FREQ)
\ No newline at end of file
+if PROFILER.enabled:
+    print("\nPerfil de memoria:")
+    print(PROFILER.report())
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Mide el tiempo de importación en frío de los puntos de entrada (main.py,
+app.py y server.py) con `python -X importtime` y opcionalmente lo registra
+para seguir su evolución.
+
+Se ejecutan los imports de nivel superior de cada archivo tal como están
+escritos, así que la medición sigue a los puntos de entrada sin mantener
+una lista aparte. Los imports diferidos (dentro de funciones) no cuentan.
+
+Uso:
+    python scripts/import_times.py
+    python scripts/import_times.py --record scripts/import_times.jsonl
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Puntos de entrada: el CLI, el worker de Streamlit y el servicio HTTP
+TARGETS = {
+    'cli': 'main.py',
+    'app': 'app.py',
+    'server': 'server.py',
+}
+
+
+def import_block(path):
+    """Los imports de nivel superior de un archivo, como código ejecutable."""
+    with open(os.path.join(ROOT, path), encoding='utf-8') as f:
+        source = f.read()
+    tree = ast.parse(source)
+    return '\n'.join(ast.get_source_segment(source, node) for node in tree.body
+                     if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def import_time(statement, repeats=3):
+    """
+    Ejecuta statement en un intérprete nuevo con -X importtime.
+
+    Retorna:
+    --------
+    - total_ms (float): Mejor tiempo acumulado de importación (ms)
+    - heaviest (list): Los módulos de mayor tiempo acumulado [(ms, módulo)]
+    """
+    best = None
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                              cwd=ROOT, capture_output=True, text=True, check=True)
+        rows = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative_us, name = line.split('|', 2)
+            rows.append((int(cumulative_us) / 1000, name[1:].rstrip()))
+        # Los módulos de primer nivel (sin sangría) suman el total
+        total = sum(ms for ms, name in rows if not name.startswith('  '))
+        if best is None or total < best[0]:
+            best = (total, rows)
+
+    total, rows = best
+    heaviest = sorted(((ms, name.strip()) for ms, name in rows), reverse=True)[:10]
+    return total, heaviest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--record', help='Archivo .jsonl donde agregar los resultados')
+    args = parser.parse_args()
+
+    results = {}
+    for target, path in TARGETS.items():
+        total, heaviest = import_time(import_block(path))
+        results[target] = round(total, 1)
+        print(f"\n[{target}] {total:.1f} ms")
+        for ms, name in heaviest:
+            print(f"  {ms:8.1f} ms  {name}")
+
+    if args.record:
+        with open(args.record, 'a') as f:
+            f.write(json.dumps({'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                                'python': sys.version.split()[0], **results}) + '\n')
+
+
+if __name__ == '__main__':
+    main()
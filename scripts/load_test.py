@@ -0,0 +1,87 @@
+"""
+Prueba de carga contra una instancia local de server.py: mide peticiones por
+segundo y latencias (p50, p99).
+
+Uso:
+    python server.py --quiet &
+    python scripts/load_test.py --url http://127.0.0.1:8000 --requests 200 --concurrency 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def request(url, body, content_type):
+    """Hace una petición y retorna (latencia en segundos, código HTTP)."""
+    req = urllib.request.Request(url, data=body, method='POST',
+                                 headers={'Content-Type': content_type})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=300) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except OSError:
+        status = 0
+    return time.perf_counter() - start, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--audio', default=os.path.join(ROOT, 'audio_samples', 'sample-15s.wav'))
+    parser.add_argument('--path', action='store_true',
+                        help='Enviar la ruta del archivo (JSON) en lugar de subirlo')
+    parser.add_argument('--query', default='filter=lowpass&fc=3000&num_taps=101',
+                        help='Parámetros del filtro')
+    parser.add_argument('--output', choices=['summary', 'audio'], default='summary')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    if args.path:
+        body = json.dumps({'path': os.path.abspath(args.audio)}).encode()
+        content_type = 'application/json'
+    else:
+        with open(args.audio, 'rb') as f:
+            body = f.read()
+        content_type = 'application/octet-stream'
+    url = f"{args.url}/process?{args.query}&output={args.output}"
+
+    # Calentamiento: calibración de motores, cachés de FFT, etc.
+    request(url, body, content_type)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(lambda _: request(url, body, content_type), range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([t for t, status in results if status == 200])
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    print(f"Peticiones: {args.requests} (concurrencia {args.concurrency}) en {elapsed:.2f} s")
+    print(f"Códigos: {dict(sorted(statuses.items()))}")
+    if len(latencies) == 0:
+        print("Ninguna petición exitosa")
+        sys.exit(1)
+    print(f"Throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"Latencia: p50 {np.percentile(latencies, 50) * 1000:.0f} ms, "
+          f"p99 {np.percentile(latencies, 99) * 1000:.0f} ms, "
+          f"máx {latencies.max() * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
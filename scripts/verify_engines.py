@@ -0,0 +1,388 @@
+"""
+Verifica que todos los motores de apply_filter, calculate_fft y
+compute_spectrogram coincidan con la referencia NumPy/SciPy en float64, y que
+ninguno sea más lento que la línea base registrada para este equipo.
+
+Se generan señales y filtros aleatorios (todas las ventanas, num_taps pares e
+impares, los cuatro tipos de filtro y los casos límite del paso banda). Un
+motor nuevo solo tiene que agregarse a FILTER_ENGINES / SPECTROGRAM_ENGINES
+(src/engines.py) para quedar cubierto.
+
+Uso:
+    python scripts/verify_engines.py                 # verifica y compara con la línea base
+    python scripts/verify_engines.py --record        # registra la línea base de este equipo
+    python scripts/verify_engines.py --cases 200 --seed 3
+
+Termina con código 1 si algún error supera su tolerancia, algún motor es
+más lento que la línea base (por más de --slack), o no hay línea base para
+este tipo de equipo (salvo con --allow-missing-baseline). La línea base se
+identifica por arquitectura y cantidad de núcleos; si cambiaron las versiones
+de NumPy/SciPy se informa y se compara igual, que es cuando más interesa.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import signal as scipy_signal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.analysis import calculate_fft, compute_spectrogram  # noqa: E402
+from src.engines import FILTER_ENGINES, SPECTROGRAM_ENGINES, _host_id  # noqa: E402
+from src.filters import apply_filter, design_filter, stream_filter, decimation_filter  # noqa: E402
+
+BASELINE_PATH = os.path.join(ROOT, 'scripts', 'engine_baseline.json')
+
+WINDOWS = ('hamming', 'blackman', 'hann', 'rectangular')
+FILTER_TYPES = ('lowpass', 'highpass', 'bandpass', 'bandstop')
+SAMPLE_RATES = (8000, 22050, 44100, 48000)
+DTYPES = (np.float32, np.float64)
+
+# Error máximo admitido, relativo al máximo de la referencia: (función, motor, dtype) -> tolerancia.
+# Con float32 las FFT de NumPy/SciPy trabajan en precisión simple.
+TOLERANCES = {
+    ('apply_filter', 'direct', 'float32'): 1e-12,
+    ('apply_filter', 'direct', 'float64'): 1e-12,
+    # El redondeo de la FFT en float32 es relativo al nivel de la entrada: con
+    # señales más cortas que un filtro muy selectivo la salida queda decenas de
+    # veces por debajo y el error relativo a ella llega a ~2e-6
+    ('apply_filter', 'fft', 'float32'): 1e-5,
+    ('apply_filter', 'fft', 'float64'): 1e-10,
+    ('apply_filter', 'oa', 'float32'): 1e-5,
+    ('apply_filter', 'oa', 'float64'): 1e-10,
+    ('apply_filter', 'stream', 'float32'): 1e-10,
+    ('apply_filter', 'stream', 'float64'): 1e-10,
+    ('calculate_fft', 'numpy', 'float32'): 1e-6,
+    ('calculate_fft', 'numpy', 'float64'): 1e-12,
+    ('compute_spectrogram', 'scipy', 'float32'): 1e-5,
+    ('compute_spectrogram', 'scipy', 'float64'): 1e-12,
+    ('compute_spectrogram', 'batch', 'float32'): 1e-5,
+    ('compute_spectrogram', 'batch', 'float64'): 1e-12,
+    # Con f_max se decima: se compara solo hasta f_max, con señales de banda limitada
+    ('calculate_fft', 'decimated', 'float32'): 1e-2,
+    ('calculate_fft', 'decimated', 'float64'): 1e-2,
+    # Sin los bins más bajos (ver LOW_BINS_SKIPPED), relativo al máximo del espectrograma
+    ('compute_spectrogram', 'decimated', 'float32'): 2e-3,
+    ('compute_spectrogram', 'decimated', 'float64'): 2e-3,
+}
+
+# Casos límite del paso banda / rechaza banda: (fc_low, fc_high) en fracción de Nyquist.
+# Los cortes invertidos o iguales deben devolver None.
+BAND_EDGE_CASES = [
+    (0.3, 0.3, None),
+    (0.5, 0.2, None),
+    (1e-4, 0.999, 'ok'),
+    (0.25, 0.2505, 'ok'),
+    (0.9, 0.999, 'ok'),
+    (1e-4, 2e-4, 'ok'),
+]
+
+
+def relative_error(result, reference):
+    """Error máximo absoluto dividido por el máximo absoluto de la referencia."""
+    result = np.asarray(result, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    if result.shape != reference.shape:
+        return np.inf
+    scale = np.max(np.abs(reference)) if reference.size else 0.0
+    error = np.max(np.abs(result - reference)) if reference.size else 0.0
+    return error / scale if scale > 0 else error
+
+
+def quiet_design(*args):
+    """design_filter sin las advertencias de num_taps par (None si los cortes son inválidos)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            return design_filter(*args)
+        except ValueError:
+            return None
+
+
+def random_design(rng):
+    """Un filtro aleatorio: tipo, cortes, ventana y num_taps (par o impar)."""
+    sr = int(rng.choice(SAMPLE_RATES))
+    filter_type = str(rng.choice(FILTER_TYPES))
+    window = str(rng.choice(WINDOWS))
+    num_taps = int(rng.integers(3, 602))
+    nyquist = sr / 2
+    if filter_type in ('bandpass', 'bandstop'):
+        cutoffs = tuple(np.sort(rng.uniform(0.001, 0.999, 2)) * nyquist)
+    else:
+        cutoffs = (rng.uniform(0.001, 0.999) * nyquist,)
+    return sr, filter_type, cutoffs, num_taps, window
+
+
+def design_cases(rng, count):
+    """Diseños aleatorios más los casos fijos: cada ventana con num_taps par e impar y los bordes de banda."""
+    cases = [random_design(rng) for _ in range(count)]
+    for window in WINDOWS:
+        for num_taps in (100, 101):
+            for filter_type in FILTER_TYPES:
+                cutoffs = (4000.0, 9000.0) if filter_type in ('bandpass', 'bandstop') else (4000.0,)
+                cases.append((44100, filter_type, cutoffs, num_taps, window))
+    return cases
+
+
+def reference_filter(x, h):
+    """
+    Referencia de apply_filter: la convolución completa recortada a len(x)
+    muestras centradas (igual a np.convolve 'same' salvo cuando x es más
+    corta que h, donde 'same' devolvería len(h) muestras).
+    """
+    start = (len(h) - 1) // 2
+    return np.convolve(x, h, mode='full')[start:start + len(x)]
+
+
+def stream_engine(signal, h):
+    """stream_filter con bloques de tamaño irregular, como otro motor de apply_filter."""
+    edges = sorted({min(e, len(signal)) for e in (0, 1, 7, len(h), 4096, 4097, len(signal))})
+    blocks = [signal[a:b] for a, b in zip(edges[:-1], edges[1:])]
+    filtered = list(stream_filter(blocks, h, 'direct'))
+    return np.concatenate(filtered) if filtered else np.zeros(0)
+
+
+def check_filters(rng, count, failures, report):
+    engines = dict(FILTER_ENGINES, stream=stream_engine)
+    for sr, filter_type, cutoffs, num_taps, window in design_cases(rng, count):
+        h = quiet_design(filter_type, cutoffs, sr, num_taps, window)
+        name = f"{filter_type} {window} taps={num_taps} fc={np.round(cutoffs, 1).tolist()}"
+        if h is None or len(h) % 2 == 0 or not np.all(np.isfinite(h)):
+            failures.append(f"diseño inválido: {name}")
+            continue
+        # Longitudes que incluyen señales más cortas que el filtro
+        for length in (int(rng.integers(1, len(h) + 1)), int(rng.integers(len(h), 50000))):
+            for dtype in DTYPES:
+                x = rng.standard_normal(length).astype(dtype)
+                reference = reference_filter(x.astype(np.float64), h)
+                for engine in engines:
+                    result = apply_filter(x, h, engine) if engine in FILTER_ENGINES else engines[engine](x, h)
+                    report('apply_filter', engine, dtype, relative_error(result, reference),
+                           f"{name} n={length}")
+
+    nyquist = 22050
+    for fc_low, fc_high, expected in BAND_EDGE_CASES:
+        for filter_type in ('bandpass', 'bandstop'):
+            for num_taps in (64, 65):
+                h = quiet_design(filter_type, (fc_low * nyquist, fc_high * nyquist), 44100, num_taps)
+                name = f"{filter_type} borde ({fc_low}, {fc_high}) taps={num_taps}"
+                if expected is None:
+                    if h is not None:
+                        failures.append(f"{name}: se esperaba None")
+                    continue
+                if h is None or not np.all(np.isfinite(h)):
+                    failures.append(f"{name}: diseño inválido")
+                    continue
+                x = rng.standard_normal(20000)
+                reference = reference_filter(x, h)
+                for engine in engines:
+                    result = apply_filter(x, h, engine) if engine in FILTER_ENGINES else engines[engine](x, h)
+                    report('apply_filter', engine, np.float64, relative_error(result, reference), name)
+
+
+def check_fft(rng, count, report):
+    for _ in range(max(1, count // 4)):
+        length = int(rng.integers(1, 100000))
+        sr = int(rng.choice(SAMPLE_RATES))
+        for dtype in DTYPES:
+            x = rng.standard_normal(length).astype(dtype)
+            reference = np.abs(np.fft.fft(x.astype(np.float64)))
+            freqs, magnitude, magnitude_db = calculate_fft(x, sr)
+            error = max(relative_error(magnitude, reference),
+                        relative_error(freqs, np.fft.fftfreq(length, 1 / sr)))
+            report('calculate_fft', 'numpy', dtype, error, f"n={length}")
+
+
+def check_spectrograms(rng, count, report):
+    for _ in range(max(1, count // 4)):
+        nperseg = int(rng.choice([128, 255, 256, 1024, 2048]))
+        noverlap = int(rng.integers(0, nperseg))
+        length = int(rng.integers(nperseg, 200000))
+        sr = int(rng.choice(SAMPLE_RATES))
+        for dtype in DTYPES:
+            x = rng.standard_normal(length).astype(dtype)
+            freqs_ref, times_ref, Sxx_ref = scipy_signal.spectrogram(
+                x.astype(np.float64), fs=sr, window='hann', nperseg=nperseg,
+                noverlap=noverlap, scaling='density')
+            for engine in SPECTROGRAM_ENGINES:
+                times, freqs, Sxx, _ = compute_spectrogram(x, sr, nperseg, noverlap, engine)
+                error = max(relative_error(Sxx, Sxx_ref), relative_error(times, times_ref),
+                            relative_error(freqs, freqs_ref))
+                report('compute_spectrogram', engine, dtype, error,
+                       f"n={length} nperseg={nperseg} noverlap={noverlap}")
+
+
+# El detrend de cada trama decimada usa menos muestras: en la continua y el
+# primer bin el error llega a ~4e-2 y taparía cualquier regresión del resto
+LOW_BINS_SKIPPED = 2
+
+
+def band_limited(rng, length, sr, f_max, dtype):
+    """Ruido filtrado por debajo de f_max, para comparar los caminos decimados."""
+    # Transición de 0.1 f_max (Blackman: ~5.5 sr / num_taps): nada por encima de 0.9 f_max
+    h = quiet_design('lowpass', (0.85 * f_max,), sr, int(55 * sr / f_max) | 1, 'blackman')
+    return apply_filter(rng.standard_normal(length), h, 'fft').astype(dtype)
+
+
+def check_decimated(rng, count, report):
+    for _ in range(max(1, count // 4)):
+        sr = int(rng.choice(SAMPLE_RATES))
+        f_max = float(rng.uniform(0.05, 0.4) * sr / 2)
+        # Longitud múltiplo de cualquier factor posible: mismos bins que la FFT completa
+        length = 720 * int(rng.integers(10, 300))
+        for dtype in DTYPES:
+            x = band_limited(rng, length, sr, f_max, dtype)
+            freqs_ref, magnitude_ref, _ = calculate_fft(x, sr)
+            freqs, magnitude, _ = calculate_fft(x, sr, f_max)
+            k = np.searchsorted(freqs[:len(freqs) // 2 + 1], f_max)
+            error = max(relative_error(magnitude[:k], magnitude_ref[:k]) * magnitude_ref[:k].max()
+                        / magnitude_ref.max(), relative_error(freqs[:k], freqs_ref[:k]))
+            report('calculate_fft', 'decimated', dtype, error, f"n={length} f_max={f_max:.0f}")
+
+            nperseg = int(rng.choice([256, 1024, 2048]))
+            times_ref, freqs_ref, Sxx_ref, _ = compute_spectrogram(x, sr, nperseg, engine='batch')
+            times, freqs, Sxx, _ = compute_spectrogram(x, sr, nperseg, engine='batch', f_max=f_max)
+            k = np.searchsorted(freqs, f_max)
+            # Las tramas a menos de medio filtro anti-alias de los bordes ven su relleno con ceros
+            edge = len(decimation_filter(sr, round(sr / (freqs[-1] * 2)), f_max)) // 2
+            inner = (times_ref > (edge + nperseg) / sr) & (times_ref < (length - edge - nperseg) / sr)
+            low = LOW_BINS_SKIPPED
+            error = max(np.max(np.abs(Sxx[low:k, inner] - Sxx_ref[low:k, inner]), initial=0) / Sxx_ref.max(),
+                        relative_error(times, times_ref), relative_error(freqs, freqs_ref[:len(freqs)]))
+            report('compute_spectrogram', 'decimated', dtype, error,
+                   f"n={length} nperseg={nperseg} f_max={f_max:.0f}")
+
+
+# Claves de _host_id() que no identifican el equipo sino las dependencias
+VERSION_KEYS = ('numpy', 'scipy')
+
+
+def baseline_identity():
+    """(equipo, versiones) para la línea base: ver _host_id en src/engines.py."""
+    host = _host_id()
+    versions = {key: host.pop(key) for key in VERSION_KEYS}
+    return host, versions
+
+
+def best_time(fn, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmarks():
+    """Tiempos (mejor de 5) de cada motor sobre tamaños representativos de la app."""
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal(2 ** 20).astype(np.float32)
+    times = {}
+    for num_taps in (101, 501):
+        h = design_filter('lowpass', (3000,), 44100, num_taps)
+        for engine in FILTER_ENGINES:
+            times[f"apply_filter/{engine}/taps={num_taps}"] = best_time(lambda: apply_filter(x, h, engine))
+    times['calculate_fft/numpy'] = best_time(lambda: calculate_fft(x, 44100))
+    times['calculate_fft/decimated/f_max=5000'] = best_time(lambda: calculate_fft(x, 44100, 5000))
+    for engine in SPECTROGRAM_ENGINES:
+        times[f"compute_spectrogram/{engine}/nperseg=2048"] = best_time(
+            lambda: compute_spectrogram(x, 44100, 2048, engine=engine), repeats=3)
+    times['compute_spectrogram/batch/decimated/f_max=5000'] = best_time(
+        lambda: compute_spectrogram(x, 44100, 2048, engine='batch', f_max=5000), repeats=3)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', type=int, default=40, help='Diseños de filtro aleatorios')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Archivo JSON de la línea base')
+    parser.add_argument('--record', action='store_true', help='Registrar la línea base de este equipo')
+    parser.add_argument('--slack', type=float, default=0.5,
+                        help='Margen admitido sobre la línea base (0.5 = 50%% más lento)')
+    parser.add_argument('--skip-benchmarks', action='store_true')
+    parser.add_argument('--allow-missing-baseline', action='store_true',
+                        help='No fallar si no hay línea base para este equipo (solo advertir)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    failures = []
+    worst = {}
+
+    def report(function, engine, dtype, error, case):
+        key = (function, engine, np.dtype(dtype).name)
+        tolerance = TOLERANCES.get(key)
+        if tolerance is None:
+            failures.append(f"{'/'.join(key)}: sin tolerancia definida")
+            tolerance = 0.0
+        elif not error <= tolerance:
+            failures.append(f"{'/'.join(key)}: error {error:.2e} > {tolerance:.0e} ({case})")
+        worst[key] = max(worst.get(key, 0.0), error)
+
+    print("Verificando equivalencia numérica...")
+    check_filters(rng, args.cases, failures, report)
+    check_fft(rng, args.cases, report)
+    check_spectrograms(rng, args.cases, report)
+    check_decimated(rng, args.cases, report)
+
+    print(f"\n{'función/motor/dtype':<40}{'error máx.':>12}{'tolerancia':>12}")
+    for key in sorted(worst):
+        print(f"{'/'.join(key):<40}{worst[key]:>12.2e}{TOLERANCES.get(key, 0.0):>12.0e}")
+
+    if not args.skip_benchmarks:
+        print("\nMidiendo tiempos...")
+        times = benchmarks()
+        baseline = None
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+
+        host, versions = baseline_identity()
+        if args.record:
+            with open(args.baseline, 'w') as f:
+                json.dump({'host': host, 'versions': versions, 'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                           'times': times}, f, indent=1)
+            print(f"Línea base guardada en {args.baseline}")
+        else:
+            problem = None
+            if baseline is None:
+                problem = f"no hay línea base en {args.baseline} (usar --record)"
+            elif baseline['host'] != host:
+                problem = (f"la línea base es de otro equipo ({baseline['host']}, este: {host}); "
+                           "registrar una con --record")
+                baseline = None
+            if problem is not None and args.allow_missing_baseline:
+                print(f"Advertencia: {problem}; no se comparan los tiempos")
+            elif problem is not None:
+                failures.append(problem)
+            else:
+                recorded = baseline.get('versions', {})
+                changed = [f"{key} {recorded.get(key)} -> {version}"
+                           for key, version in versions.items() if recorded.get(key) != version]
+                if changed:
+                    print(f"Versiones distintas de la línea base: {', '.join(changed)}")
+
+        print(f"\n{'caso':<45}{'ms':>10}{'base ms':>10}")
+        for case, seconds in times.items():
+            reference = baseline['times'].get(case) if baseline and not args.record else None
+            print(f"{case:<45}{seconds * 1000:>10.2f}"
+                  + (f"{reference * 1000:>10.2f}" if reference else f"{'-':>10}"))
+            if reference and seconds > reference * (1 + args.slack):
+                failures.append(f"{case}: {seconds * 1000:.2f} ms, más lento que la línea base "
+                                f"({reference * 1000:.2f} ms)")
+
+    if failures:
+        print(f"\n{len(failures)} fallas:")
+        for failure in failures[:50]:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nTodo correcto")
+
+
+if __name__ == '__main__':
+    main()
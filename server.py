@@ -0,0 +1,334 @@
+"""
+Servicio HTTP local para procesar audio sin pasar por la interfaz de Streamlit.
+
+Uso:
+    python server.py --port 8000 --workers 4 --max-queue 16
+
+Endpoints:
+    GET    /health                 Estado del servicio y ocupación de la cola
+    POST   /process?...            Procesa y responde al terminar (JSON con el
+                                   resumen, o el audio filtrado con output=audio)
+    POST   /jobs?...               Encola un trabajo y responde su id (202)
+    GET    /jobs/<id>              Estado, progreso y resumen espectral
+    GET    /jobs/<id>/audio        Audio filtrado (WAV en streaming, o format=flac|ogg)
+    DELETE /jobs/<id>              Cancela el trabajo o libera su resultado
+
+Parámetros de consulta para /process y /jobs:
+    filter=lowpass|highpass|bandpass|bandstop, fc=... (o fc_low=...&fc_high=...),
+    num_taps=101 (hasta 4095), start=..., end=... (segundos), input_format=wav|flac|ogg|mp3
+    (del audio subido; por defecto se detecta). Con output=audio, /process
+    acepta además format=wav|flac|ogg para el audio de salida.
+
+El cuerpo es el archivo de audio, o un JSON {"path": "..."} con
+Content-Type: application/json para procesar un archivo local.
+"""
+import argparse
+import json
+import math
+import os
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from src.audio_io import encode_audio, iter_wav, ENCODINGS
+from src.engines import calibrate_in_background
+from src.jobs import JobExecutor
+from src.pipeline import process_audio
+
+# Filtros más largos no mejoran la respuesta de forma apreciable y ocuparían
+# un worker durante mucho tiempo
+MAX_NUM_TAPS = 4095
+
+
+class ServiceError(Exception):
+    """Error de la petición: se responde con el código HTTP indicado."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ProcessingService:
+    """
+    Cola acotada de trabajos sobre un pool de workers.
+
+    Parámetros:
+    -----------
+    - workers (int): Trabajos procesados en paralelo
+    - max_queue (int): Trabajos admitidos a la vez (en cola + en proceso);
+      por encima se responde 503
+    """
+
+    def __init__(self, workers=4, max_queue=16, max_finished=64):
+        self.executor = JobExecutor(max_workers=workers)
+        self.max_queue = max_queue
+        self.max_finished = max_finished
+        self._active = 0
+        self._finished = deque()
+        self._lock = threading.Lock()
+
+    def submit(self, source, params, keep=True):
+        """
+        Encola process_audio(source, **params). Con keep=True el resultado
+        queda disponible para consultarlo después (los más viejos se liberan).
+        """
+        with self._lock:
+            if self._active >= self.max_queue:
+                raise ServiceError(503, "Cola llena, reintentar más tarde")
+            self._active += 1
+        # Clave única: los trabajos del servicio no se comparten entre clientes
+        job = self.executor.submit(object(), process_audio, source, **params)
+        job.future.add_done_callback(lambda _: self._done(job.id, keep))
+        return job
+
+    def _done(self, job_id, keep):
+        with self._lock:
+            self._active -= 1
+            if not keep:
+                return
+            self._finished.append(job_id)
+            while len(self._finished) > self.max_finished:
+                self.executor.pop(self._finished.popleft())
+
+    def get(self, job_id):
+        job = self.executor.get(job_id)
+        if job is None:
+            raise ServiceError(404, f"Trabajo {job_id} no encontrado")
+        return job
+
+    def queued(self):
+        with self._lock:
+            return self._active
+
+
+def parse_params(query):
+    """
+    Convierte los parámetros de consulta en argumentos de process_audio.
+    Valida también output y format, para no procesar antes de rechazarlos.
+    El rango de las frecuencias de corte depende de la frecuencia de muestreo
+    y lo valida design_filter (ValueError, 400) después de decodificar.
+    """
+    def number(name, cast=float, default=None):
+        values = query.get(name)
+        if not values:
+            return default
+        try:
+            value = cast(values[0])
+        except ValueError:
+            raise ServiceError(400, f"Parámetro '{name}' inválido")
+        if not math.isfinite(value):
+            raise ServiceError(400, f"Parámetro '{name}' inválido")
+        return value
+
+    filter_type = query.get('filter', ['lowpass'])[0]
+    if filter_type in ('bandpass', 'bandstop'):
+        cutoffs = (number('fc_low'), number('fc_high'))
+    else:
+        cutoffs = (number('fc'),)
+    if None in cutoffs or filter_type not in ('lowpass', 'highpass', 'bandpass', 'bandstop'):
+        raise ServiceError(400, "Especificar filter y fc (o fc_low y fc_high)")
+    if min(cutoffs) <= 0:
+        raise ServiceError(400, "Las frecuencias de corte deben ser positivas")
+
+    num_taps = number('num_taps', int, 101)
+    if not 1 <= num_taps <= MAX_NUM_TAPS:
+        raise ServiceError(400, f"num_taps debe estar entre 1 y {MAX_NUM_TAPS}")
+    start, end = number('start'), number('end')
+    if start is not None and end is not None and end <= start:
+        raise ServiceError(400, "El rango de tiempo está vacío: end debe ser mayor que start")
+
+    output = query.get('output', ['summary'])[0]
+    if output not in ('summary', 'audio'):
+        raise ServiceError(400, f"output debe ser 'summary' o 'audio' (recibido: '{output}')")
+    if output == 'audio':
+        audio_format = query.get('format', ['wav'])[0]
+        if audio_format not in ENCODINGS:
+            raise ServiceError(400, f"Formato '{audio_format}' no soportado")
+
+    return {
+        'filter_type': filter_type,
+        'cutoffs': cutoffs,
+        'num_taps': num_taps,
+        'start': start,
+        'end': end,
+        'format': query.get('input_format', [None])[0],
+    }
+
+
+def summary_json(result):
+    freqs, psd_orig_db, psd_filt_db = result['summary']
+    return {
+        'sr': result['sr'],
+        'samples': len(result['y_filtered']),
+        'num_taps': len(result['h']),
+        'frequencies': freqs.round(2).tolist(),
+        'psd_original_db': psd_orig_db.round(2).tolist(),
+        'psd_filtered_db': psd_filt_db.round(2).tolist(),
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    service = None
+    max_upload = 200 * 1024 ** 2
+    protocol_version = 'HTTP/1.1'
+
+    # ---- respuestas ----
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_audio(self, result, audio_format):
+        """Envía el audio filtrado con Transfer-Encoding: chunked."""
+        if audio_format not in ENCODINGS:
+            raise ServiceError(400, f"Formato '{audio_format}' no soportado")
+        if audio_format == 'wav':
+            chunks = iter_wav(result['y_filtered'], result['sr'])
+        else:
+            data = encode_audio(result['y_filtered'], result['sr'], audio_format)
+            chunks = (data[i:i + 65536] for i in range(0, len(data), 65536))
+
+        self.send_response(200)
+        self.send_header('Content-Type', ENCODINGS[audio_format][2])
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(f'{len(chunk):X}\r\n'.encode() + chunk + b'\r\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+    # ---- peticiones ----
+
+    def read_source(self):
+        length = int(self.headers.get('Content-Length', 0))
+        if length <= 0:
+            raise ServiceError(400, "Falta el audio en el cuerpo de la petición")
+        if length > self.max_upload:
+            raise ServiceError(413, "Archivo demasiado grande")
+        body = self.rfile.read(length)
+        if self.headers.get('Content-Type', '').startswith('application/json'):
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = None
+            path = payload.get('path') if isinstance(payload, dict) else None
+            if not isinstance(path, str):
+                raise ServiceError(400, "Se esperaba un JSON {\"path\": ...}")
+            if not os.path.isfile(path):
+                raise ServiceError(404, f"No existe el archivo '{path}'")
+            return path
+        return body
+
+    def dispatch(self, method):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        query = parse_qs(url.query)
+        try:
+            if method == 'GET' and parts == ['health']:
+                self.send_json(200, {'status': 'ok', 'queued': self.service.queued(),
+                                     'max_queue': self.service.max_queue})
+            elif method == 'POST' and parts in (['process'], ['jobs']):
+                job = self.service.submit(self.read_source(), parse_params(query),
+                                          keep=(parts == ['jobs']))
+                if parts == ['jobs']:
+                    self.send_json(202, {'id': job.id})
+                    return
+                try:
+                    result = job.result()
+                finally:
+                    self.service.executor.pop(job.id)
+                if query.get('output', ['summary'])[0] == 'audio':
+                    self.send_audio(result, query.get('format', ['wav'])[0])
+                else:
+                    self.send_json(200, summary_json(result))
+            elif len(parts) >= 2 and parts[0] == 'jobs' and parts[1].isdigit():
+                job = self.service.get(int(parts[1]))
+                if method == 'DELETE' and len(parts) == 2:
+                    self.service.executor.cancel(job.id)
+                    self.send_json(200, {'id': job.id, 'status': 'cancelled'})
+                elif method == 'GET' and len(parts) == 2:
+                    payload = {'id': job.id, 'status': job.status,
+                               'stage': job.stage, 'progress': job.progress}
+                    if job.status == 'done':
+                        payload['summary'] = summary_json(job.result())
+                    elif job.status == 'error':
+                        payload['error'] = str(job.error())
+                    self.send_json(200, payload)
+                elif method == 'GET' and parts[2:] == ['audio']:
+                    if job.status != 'done':
+                        raise ServiceError(409, f"El trabajo está en estado '{job.status}'")
+                    self.send_audio(job.result(), query.get('format', ['wav'])[0])
+                else:
+                    raise ServiceError(404, "Ruta no encontrada")
+            else:
+                raise ServiceError(404, "Ruta no encontrada")
+        except Exception as e:
+            # Tras un error el cuerpo puede no haberse leído: se cierra la conexión
+            self.close_connection = True
+            if isinstance(e, ServiceError):
+                self.send_json(e.status, {'error': str(e)})
+            elif isinstance(e, FileNotFoundError):
+                self.send_json(404, {'error': str(e)})
+            elif isinstance(e, ValueError):
+                # Incluye AudioDecodeError: la entrada no es audio válido
+                self.send_json(400, {'error': str(e)})
+            else:
+                self.send_json(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host='127.0.0.1', port=8000, workers=4, max_queue=16, max_upload_mb=200, quiet=False):
+    """Crea el servidor HTTP (sin iniciarlo) con su servicio de procesamiento."""
+    handler = type('ServiceHandler', (Handler,), {
+        'service': ProcessingService(workers, max_queue),
+        'max_upload': max_upload_mb * 1024 ** 2,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.quiet = quiet
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP de filtrado y análisis de audio")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=4, help='Trabajos en paralelo')
+    parser.add_argument('--max-queue', type=int, default=16, help='Trabajos admitidos a la vez')
+    parser.add_argument('--max-upload-mb', type=int, default=200)
+    parser.add_argument('--quiet', action='store_true', help='No registrar cada petición')
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.workers, args.max_queue,
+                         args.max_upload_mb, args.quiet)
+    # Sin tabla de motores, las primeras peticiones usan la tabla por defecto
+    calibrate_in_background()
+    print(f"Escuchando en http://{args.host}:{args.port} "
+          f"({args.workers} workers, cola de {args.max_queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.RequestHandlerClass.service.executor.shutdown(wait=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,9 @@
 import numpy as np
 from scipy import signal as scipy_signal
 
-def calculate_fft(signal, sr):
+from .filters import decimation_factor, decimate
+
+def calculate_fft(signal, sr, f_max=None):
     """
     Calcula la FFT de la señal y retorna magnitud y frecuencias
     
@@ -9,6 +11,10 @@ def calculate_fft(signal, sr):
     ----------
     - signal (ndarray): Señal en el dominio del tiempo
     - sr (float): Frecuencia de muestreo
+    - f_max (float, optional): Frecuencia máxima de interés. Si está bastante
+      por debajo de Nyquist, la señal se decima antes (ver decimate) por un
+      factor que divida su longitud, y el espectro solo llega hasta la nueva
+      Nyquist. Default: espectro completo
     
     Retorna
     ----------
@@ -16,8 +22,17 @@ def calculate_fft(signal, sr):
     - magnitude (ndarray): Magnitud del espectro
     - magnitude_db (ndarray): Magnitud en dB
     """
+    factor = decimation_factor(sr, f_max)
+    # Con un factor que divide la longitud, los bins son exactamente los de la
+    # FFT completa (y una longitud potencia de 2 sigue siéndolo)
+    while factor > 1 and len(signal) % factor:
+        factor -= 1
+    signal, sr = decimate(signal, sr, factor, f_max)
     fft_result = np.fft.fft(signal)
     magnitude = np.abs(fft_result)
+    if factor > 1:
+        # Misma resolución en Hz con factor veces menos muestras: se compensa la escala
+        magnitude *= factor
     magnitude_db = 20 * np.log10(magnitude + 1e-10)
     frequencies = np.fft.fftfreq(len(signal), 1/sr)
     
@@ -69,7 +84,29 @@ def spectral_difference(signal_original, signal_processed, sr):
     
     return freqs_orig, difference_db
 
-def compute_spectrogram(signal, sr, nperseg=2048, noverlap=None):
+def _decimate_for_stft(signal, sr, nperseg, noverlap, f_max):
+    """
+    Decima la señal para una STFT limitada a f_max y escala nperseg y noverlap
+    para conservar la duración de las ventanas: el resultado son las primeras
+    filas (frecuencias) de la STFT completa. La densidad espectral (escala
+    'density') no cambia al decimar, así que no hace falta reescalar Sxx.
+    """
+    factor = decimation_factor(sr, f_max)
+    # El factor tiene que dividir nperseg y el salto para que las tramas y los
+    # bins coincidan exactamente con los de la STFT completa (con al menos 16
+    # muestras por trama). Solo difieren levemente los bins más bajos, porque
+    # la media que se resta a cada trama se estima con menos muestras
+    step = nperseg - noverlap
+    factor = min(factor, nperseg // 16)
+    while factor > 1 and (nperseg % factor or step % factor):
+        factor -= 1
+    if factor <= 1:
+        return signal, sr, nperseg, noverlap
+    signal, sr = decimate(signal, sr, factor, f_max)
+    return signal, sr, nperseg // factor, noverlap // factor
+
+
+def compute_spectrogram(signal, sr, nperseg=2048, noverlap=None, engine=None, f_max=None):
     """
     Calcula el espectrograma de una señal usando STFT.
     
@@ -79,6 +116,12 @@ def compute_spectrogram(signal, sr, nperseg=2048, noverlap=None):
     - sr (float): Frecuencia de muestreo
     - nperseg (int): Longitud de cada segmento (ventana). Default: 2048
     - noverlap (int, optional): Número de muestras de solapamiento. Default: nperseg // 2
+    - engine (str, optional): 'scipy' o 'batch'. Default: el más rápido según
+      la calibración del equipo (ver src/engines.py)
+    - f_max (float, optional): Frecuencia máxima de interés. Si está bastante
+      por debajo de Nyquist, se decima la señal y se reducen nperseg y noverlap
+      en el mismo factor: igual resolución en tiempo y frecuencia, con
+      frecuencias solo hasta la nueva Nyquist. Default: banda completa
 
     Retorna:
     --------
@@ -87,18 +130,281 @@ def compute_spectrogram(signal, sr, nperseg=2048, noverlap=None):
     - Sxx (ndarray): Espectrograma (magnitud al cuadrado)
     - Sxx_db (ndarray): Espectrograma en dB
     """
+    from .engines import spectrogram_engine
+
     if noverlap is None:
         noverlap = nperseg // 2
     
-    frequencies, times, Sxx = scipy_signal.spectrogram(
-        signal,
-        fs=sr,
-        window='hann',
-        nperseg=nperseg,
-        noverlap=noverlap,
-        scaling='density'
-    )
+    signal, sr, nperseg, noverlap = _decimate_for_stft(signal, sr, nperseg, noverlap, f_max)
+    times, frequencies, Sxx = spectrogram_engine(signal, nperseg, engine)(signal, sr, nperseg, noverlap)
     
     Sxx_db = 10 * np.log10(Sxx + 1e-10)
     
-    return times, frequencies, Sxx, Sxx_db
\ No newline at end of file
+    return times, frequencies, Sxx, Sxx_db
+
+def filter_power_response(filter_coeffs, frequencies, sr):
+    """
+    Evalúa |H(f)|² de un filtro FIR en un conjunto arbitrario de frecuencias.
+    
+    Parámetros:
+    -----------
+    - filter_coeffs (ndarray): Coeficientes del filtro
+    - frequencies (ndarray): Frecuencias donde evaluar (Hz)
+    - sr (float): Frecuencia de muestreo
+
+    Retorna:
+    --------
+    - power (ndarray): Ganancia en potencia |H(f)|²
+    """
+    _, H = scipy_signal.freqz(filter_coeffs, worN=np.asarray(frequencies, dtype=float), fs=sr)
+    return np.abs(H) ** 2
+
+
+def compute_spectrogram_approx(frequencies, Sxx, filter_coeffs, sr):
+    """
+    Aproxima el espectrograma de la señal filtrada a partir del espectrograma
+    original, escalando cada fila por |H(f)|².
+    
+    Es una buena aproximación cuando el filtro es mucho más corto que nperseg:
+    el costo es una multiplicación en lugar de una STFT completa.
+    
+    Parámetros:
+    -----------
+    - frequencies (ndarray): Frecuencias del espectrograma original (Hz)
+    - Sxx (ndarray): Espectrograma original (magnitud al cuadrado)
+    - filter_coeffs (ndarray): Coeficientes del filtro
+    - sr (float): Frecuencia de muestreo
+
+    Retorna:
+    --------
+    - Sxx_filt (ndarray): Espectrograma aproximado de la señal filtrada
+    - Sxx_filt_db (ndarray): Espectrograma aproximado en dB
+    """
+    power = filter_power_response(filter_coeffs, frequencies, sr)
+    Sxx_filt = Sxx * power[:, np.newaxis]
+    Sxx_filt_db = 10 * np.log10(Sxx_filt + 1e-10)
+    
+    return Sxx_filt, Sxx_filt_db
+
+
+def estimate_approx_error(signal, sr, filter_coeffs, nperseg=2048, noverlap=None,
+                          probe_seconds=1.0):
+    """
+    Mide el error de compute_spectrogram_approx sobre un fragmento de la señal.
+    
+    Filtra exactamente un fragmento central (con el contexto necesario para que
+    coincida con filtrar la señal completa), calcula su espectrograma exacto y
+    lo compara con la aproximación.
+    
+    Parámetros:
+    -----------
+    - signal (ndarray): Señal original
+    - sr (float): Frecuencia de muestreo
+    - filter_coeffs (ndarray): Coeficientes del filtro
+    - nperseg (int): Longitud de cada segmento. Default: 2048
+    - noverlap (int, optional): Solapamiento. Default: nperseg // 2
+    - probe_seconds (float): Duración del fragmento de prueba. Default: 1.0
+
+    Retorna:
+    --------
+    - rel_error (float): Error relativo ||S_aprox - S_exacto|| / ||S_exacto||
+    - max_error_db (float): Error máximo en dB en las celdas a menos de 60 dB del pico
+    """
+    from .filters import apply_filter
+
+    probe_len = min(len(signal), max(nperseg, int(probe_seconds * sr)))
+    start = (len(signal) - probe_len) // 2
+    pad = len(filter_coeffs) // 2
+    lo = max(0, start - pad)
+    hi = min(len(signal), start + probe_len + pad)
+
+    # Filtrado exacto del fragmento con su contexto
+    probe_filtered = apply_filter(signal[lo:hi], filter_coeffs)
+    probe_filtered = probe_filtered[start - lo:start - lo + probe_len]
+    probe = signal[start:start + probe_len]
+
+    _, freqs, Sxx_probe, _ = compute_spectrogram(probe, sr, nperseg, noverlap)
+    _, _, Sxx_exact, Sxx_exact_db = compute_spectrogram(probe_filtered, sr, nperseg, noverlap)
+    Sxx_approx, Sxx_approx_db = compute_spectrogram_approx(freqs, Sxx_probe, filter_coeffs, sr)
+
+    norm = np.linalg.norm(Sxx_exact)
+    rel_error = float(np.linalg.norm(Sxx_approx - Sxx_exact) / norm) if norm > 0 else 0.0
+
+    relevant = Sxx_exact_db > Sxx_exact_db.max() - 60
+    if np.any(relevant):
+        max_error_db = float(np.max(np.abs(Sxx_approx_db - Sxx_exact_db)[relevant]))
+    else:
+        max_error_db = 0.0
+
+    return rel_error, max_error_db
+
+
+def compute_spectrograms_batch(signals, sr, nperseg=2048, noverlap=None, keep_power=True, f_max=None):
+    """
+    Calcula los espectrogramas de varias señales de igual longitud en una sola
+    pasada: un único enventanado por vista strided y una única rfft en lote.
+    Equivale a llamar compute_spectrogram sobre cada señal.
+    
+    Parámetros:
+    -----------
+    - signals (ndarray o lista): Señales apiladas, forma (n_señales, n_muestras)
+    - sr (float): Frecuencia de muestreo
+    - nperseg (int): Longitud de cada segmento (ventana). Default: 2048
+    - noverlap (int, optional): Número de muestras de solapamiento. Default: nperseg // 2
+    - keep_power (bool): Si es False, la conversión a dB se hace sobre el mismo
+      array de potencia (Sxx se retorna como None). Default: True
+    - f_max (float, optional): Frecuencia máxima de interés (ver compute_spectrogram)
+
+    Retorna:
+    --------
+    - times (ndarray): Array de tiempos (segundos)
+    - frequencies (ndarray): Array de frecuencias (Hz)
+    - Sxx (ndarray o None): Espectrogramas, forma (n_señales, n_freqs, n_tiempos)
+    - Sxx_db (ndarray): Espectrogramas en dB, misma forma
+    """
+    if noverlap is None:
+        noverlap = nperseg // 2
+    
+    signals = np.atleast_2d(np.asarray(signals))
+    signals, sr, nperseg, noverlap = _decimate_for_stft(signals, sr, nperseg, noverlap, f_max)
+    step = nperseg - noverlap
+    
+    # Vista (n_señales, n_tramas, nperseg) sin copiar datos
+    frames = np.lib.stride_tricks.sliding_window_view(signals, nperseg, axis=-1)[:, ::step, :]
+    
+    # Mismo preprocesado que scipy.signal.spectrogram: detrend constante y Hann periódica
+    frames = frames - frames.mean(axis=-1, keepdims=True)
+    window = scipy_signal.get_window('hann', nperseg)
+    frames *= window
+    
+    spectrum = np.fft.rfft(frames, axis=-1)
+    del frames
+    
+    # Potencia con escala 'density', calculada sin intermedios extra
+    Sxx = np.abs(spectrum)
+    del spectrum
+    np.square(Sxx, out=Sxx)
+    Sxx *= 1.0 / (sr * np.sum(window ** 2))
+    if nperseg % 2:
+        Sxx[..., 1:] *= 2
+    else:
+        Sxx[..., 1:-1] *= 2
+    
+    # (n_señales, n_tramas, n_freqs) -> (n_señales, n_freqs, n_tiempos)
+    Sxx = np.ascontiguousarray(Sxx.transpose(0, 2, 1))
+    
+    frequencies = np.fft.rfftfreq(nperseg, 1/sr)
+    times = (np.arange(Sxx.shape[-1]) * step + nperseg / 2) / sr
+    
+    Sxx_db = Sxx.copy() if keep_power else Sxx
+    Sxx_db += 1e-10
+    np.log10(Sxx_db, out=Sxx_db)
+    Sxx_db *= 10
+    
+    return times, frequencies, (Sxx if keep_power else None), Sxx_db
+
+
+def zoom_filter_response(filter_coeffs, sr, f_min=0.0, f_max=None, num_points=1024, scale='linear'):
+    """
+    Calcula la respuesta en frecuencia de un filtro solo en la banda de interés.
+    
+    Con escala lineal usa la transformada chirp-z (zoom FFT); con escala
+    logarítmica evalúa H(f) directamente sobre la grilla. La resolución depende
+    de num_points y no de un nfft grande sobre todo el rango 0..sr/2.
+    
+    Parámetros:
+    -----------
+    - filter_coeffs (ndarray): Coeficientes del filtro
+    - sr (float): Frecuencia de muestreo
+    - f_min (float): Frecuencia inicial (Hz). Default: 0
+    - f_max (float, optional): Frecuencia final (Hz). Default: sr / 2
+    - num_points (int): Cantidad de puntos de la grilla. Default: 1024
+    - scale (str): 'linear' o 'log'
+
+    Retorna:
+    --------
+    - frequencies (ndarray): Array de frecuencias (Hz)
+    - magnitude_db (ndarray): Respuesta en magnitud (dB)
+    """
+    if f_max is None:
+        f_max = sr / 2
+    
+    if scale == 'linear':
+        frequencies = np.linspace(f_min, f_max, num_points)
+        H = scipy_signal.zoom_fft(filter_coeffs, [f_min, f_max], m=num_points,
+                                  fs=sr, endpoint=True)
+    elif scale == 'log':
+        if f_min <= 0:
+            raise ValueError("La escala logarítmica requiere f_min > 0")
+        frequencies = np.geomspace(f_min, f_max, num_points)
+        _, H = scipy_signal.freqz(filter_coeffs, worN=frequencies, fs=sr)
+    else:
+        raise ValueError(f"Escala '{scale}' no reconocida")
+    
+    magnitude_db = 20 * np.log10(np.abs(H) + 1e-10)
+    
+    return frequencies, magnitude_db
+
+
+def find_cutoff_3db(filter_coeffs, sr, fc, span=None, num_points=2048):
+    """
+    Mide la frecuencia donde la respuesta del filtro cruza -3 dB cerca de fc,
+    usando una grilla fina solo alrededor de fc.
+    
+    Parámetros:
+    -----------
+    - filter_coeffs (ndarray): Coeficientes del filtro
+    - sr (float): Frecuencia de muestreo
+    - fc (float): Frecuencia de corte nominal (Hz)
+    - span (float, optional): Ancho de la banda analizada alrededor de fc.
+      Default: 4 * sr / len(filter_coeffs) (algunos anchos de transición)
+    - num_points (int): Cantidad de puntos de la grilla. Default: 2048
+
+    Retorna:
+    --------
+    - f_3db (float o None): Frecuencia de -3 dB (Hz), o None si no hay cruce
+    """
+    if span is None:
+        span = 4 * sr / len(filter_coeffs)
+    f_min = max(0.0, fc - span / 2)
+    f_max = min(sr / 2, fc + span / 2)
+    
+    frequencies, magnitude_db = zoom_filter_response(filter_coeffs, sr, f_min, f_max, num_points)
+    
+    above = magnitude_db >= -3
+    crossings = np.where(above[:-1] != above[1:])[0]
+    if len(crossings) == 0:
+        return None
+    
+    # Cruce más cercano a fc, interpolado linealmente
+    i = crossings[np.argmin(np.abs(frequencies[crossings] - fc))]
+    f0, f1 = frequencies[i], frequencies[i + 1]
+    m0, m1 = magnitude_db[i], magnitude_db[i + 1]
+    
+    return float(f0 + (-3 - m0) * (f1 - f0) / (m1 - m0))
+
+
+def spectral_summary(signal, sr, nperseg=1024):
+    """
+    Resume el espectro de una señal con el método de Welch (promedio de
+    segmentos cortos): pocos puntos, útil para vistas previas y reportes.
+    Equivale a scipy.signal.welch, pero promedia el espectrograma en lote,
+    que es bastante más rápido y acepta varias señales apiladas.
+    
+    Parámetros:
+    -----------
+    - signal (ndarray): Señal, o señales de igual longitud apiladas (n_señales, n_muestras)
+    - sr (float): Frecuencia de muestreo
+    - nperseg (int): Longitud de cada segmento. Default: 1024
+
+    Retorna:
+    --------
+    - frequencies (ndarray): Array de frecuencias (Hz)
+    - psd_db (ndarray): Densidad espectral de potencia en dB (una fila por señal si se apilaron)
+    """
+    signal = np.asarray(signal)
+    nperseg = min(nperseg, signal.shape[-1])
+    _, frequencies, Sxx, _ = compute_spectrograms_batch(signal, sr, nperseg)
+    psd_db = 10 * np.log10(Sxx.mean(axis=-1) + 1e-10)
+    
+    return frequencies, (psd_db if signal.ndim > 1 else psd_db[0])
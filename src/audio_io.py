@@ -0,0 +1,305 @@
+import io
+import os
+import struct
+
+import numpy as np
+import soundfile as sf
+
+# Formatos que soundfile decodifica directamente (sin pasar por librosa)
+SOUNDFILE_FORMATS = {'wav', 'flac', 'ogg', 'aiff', 'aif'}
+
+
+def _format_of(source, format=None):
+    """Deduce el formato a partir del parámetro, la extensión o el nombre del archivo."""
+    if format is not None:
+        return format.lower()
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+    return os.path.splitext(str(name))[1].lstrip('.').lower()
+
+
+class AudioDecodeError(ValueError):
+    """El archivo no es audio o no se pudo decodificar (error de la entrada, no del programa)."""
+
+
+def _prepare(source, format=None):
+    """Normaliza source (bytes -> BytesIO) y deduce su formato; verifica que la ruta exista."""
+    if isinstance(source, (str, os.PathLike)) and not os.path.isfile(source):
+        raise FileNotFoundError(f"No existe el archivo '{source}'")
+    fmt = _format_of(source, format)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return source, fmt
+
+
+def _open_soundfile(source, fmt):
+    """Abre source con soundfile, o retorna None si el formato requiere librosa."""
+    if fmt not in SOUNDFILE_FORMATS and fmt != '':
+        return None
+    position = source.tell() if hasattr(source, 'tell') else None
+    try:
+        return sf.SoundFile(source)
+    except sf.LibsndfileError as e:
+        if fmt != '':
+            raise AudioDecodeError(f"No se pudo decodificar el audio ({fmt}): {getattr(e, 'error_string', e)}") from e
+        # Formato desconocido que soundfile no reconoce: se prueba con librosa
+        if position is not None:
+            source.seek(position)
+        return None
+
+
+def _librosa_load(source):
+    """Decodifica con librosa (ffmpeg/audioread) los formatos que soundfile no lee."""
+    import librosa
+    try:
+        return librosa.load(source, sr=None)
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise AudioDecodeError(f"No se pudo decodificar el audio: {getattr(e, 'error_string', e)}") from e
+
+
+def _to_mono(y):
+    """Promedia los canales, igual que librosa.load(mono=True)."""
+    if y.ndim > 1:
+        y = y.mean(axis=1, dtype=np.float32)
+    return y
+
+
+def load_audio(source, format=None, start=None, end=None):
+    """
+    Carga un archivo de audio como señal mono float32 a su frecuencia de
+    muestreo original.
+
+    WAV/FLAC/OGG se decodifican directamente con soundfile; el resto (por
+    ejemplo MP3) recurre a librosa, que se importa recién en ese momento.
+
+    Parámetros:
+    -----------
+    - source (str, ruta o archivo binario): Archivo de audio
+    - format (str, optional): Formato ('wav', 'mp3', ...). Default: según la extensión
+    - start (float, optional): Inicio del fragmento en segundos. Default: 0
+    - end (float, optional): Fin del fragmento en segundos. Default: fin del archivo
+
+    Retorna:
+    --------
+    - y (ndarray): Señal mono (float32)
+    - sr (int): Frecuencia de muestreo
+    """
+    y, sr, _ = load_segment(source, start, end, margin=0, format=format)
+    return y, sr
+
+
+def audio_info(source, format=None):
+    """
+    Frecuencia de muestreo y cantidad de muestras de un archivo de audio. Con
+    soundfile solo se lee la cabecera; los formatos que requieren librosa
+    (por ejemplo MP3) se decodifican completos.
+
+    Parámetros:
+    -----------
+    - source (str, ruta o archivo binario): Archivo de audio
+    - format (str, optional): Formato. Default: según la extensión
+
+    Retorna:
+    --------
+    - sr (int): Frecuencia de muestreo
+    - num_samples (int): Muestras por canal
+    """
+    source, fmt = _prepare(source, format)
+
+    f = _open_soundfile(source, fmt)
+    if f is not None:
+        with f:
+            return f.samplerate, f.frames
+
+    y, sr = _librosa_load(source)
+    return sr, len(y)
+
+
+def segment_bounds(num_samples, sr, start=None, end=None, min_samples=1):
+    """
+    Convierte un rango en segundos a índices de muestra [a, b) dentro de la señal.
+    Lanza ValueError si el rango (recortado a la señal) tiene menos de min_samples muestras.
+    """
+    a = 0 if start is None else int(round(start * sr))
+    b = num_samples if end is None else int(round(end * sr))
+    a = min(max(a, 0), num_samples)
+    b = min(max(b, a), num_samples)
+    if b == a:
+        raise ValueError(f"El rango de tiempo está vacío ({a / sr:.3f}–{b / sr:.3f} s)")
+    if b - a < min_samples:
+        raise ValueError(f"El rango de tiempo debe durar al menos {min_samples / sr:.3f} s "
+                         f"({min_samples} muestras)")
+    return a, b
+
+
+def load_segment(source, start=None, end=None, margin=0, format=None):
+    """
+    Decodifica solo el fragmento [start, end) más margin muestras de contexto
+    a cada lado (recortadas en los bordes del archivo). Con soundfile se
+    hace seek y se leen únicamente esas muestras.
+
+    El contexto permite filtrar el fragmento y obtener exactamente las mismas
+    muestras que filtrando el archivo completo (ver apply_filter_segment).
+
+    Parámetros:
+    -----------
+    - source (str, ruta o archivo binario): Archivo de audio
+    - start (float, optional): Inicio en segundos. Default: 0
+    - end (float, optional): Fin en segundos. Default: fin del archivo
+    - margin (int): Muestras de contexto a cada lado. Default: 0
+    - format (str, optional): Formato. Default: según la extensión
+
+    Retorna:
+    --------
+    - y (ndarray): Fragmento mono (float32) incluyendo el contexto
+    - sr (int): Frecuencia de muestreo
+    - margins (tuple): (antes, después) muestras de contexto incluidas
+
+    Lanza ValueError si el fragmento está vacío (ver segment_bounds),
+    AudioDecodeError si el audio no se puede decodificar y FileNotFoundError
+    si la ruta no existe.
+    """
+    source, fmt = _prepare(source, format)
+
+    f = _open_soundfile(source, fmt)
+    if f is not None:
+        with f:
+            sr = f.samplerate
+            a, b = segment_bounds(f.frames, sr, start, end)
+            lo, hi = max(0, a - margin), min(f.frames, b + margin)
+            f.seek(lo)
+            y = f.read(hi - lo, dtype='float32', always_2d=False)
+        return _to_mono(y), sr, (a - lo, hi - b)
+
+    # Formatos que necesitan ffmpeg/audioread: se decodifica todo y se recorta
+    y, sr = _librosa_load(source)
+    a, b = segment_bounds(len(y), sr, start, end)
+    y, margins = slice_with_margin(y, a, b, margin)
+    return y, sr, margins
+
+
+def iter_blocks(source, blocksize=65536, start=None, end=None, format=None, margin=0):
+    """
+    Lee el fragmento [start, end) por bloques consecutivos, sin decodificar
+    el archivo completo en memoria (salvo los formatos que requieren librosa).
+
+    Parámetros:
+    -----------
+    - source (str, ruta o archivo binario): Archivo de audio
+    - blocksize (int): Muestras por bloque. Default: 65536
+    - start, end (float, optional): Fragmento a leer, en segundos
+    - format (str, optional): Formato. Default: según la extensión
+    - margin (int): Muestras de contexto a cada lado, como en load_segment. Default: 0
+
+    Retorna:
+    --------
+    - sr (int): Frecuencia de muestreo
+    - blocks (generator de ndarray): Bloques mono (float32), con el contexto
+    - margins (tuple): (antes, después) muestras de contexto incluidas
+    """
+    source, fmt = _prepare(source, format)
+
+    f = _open_soundfile(source, fmt)
+    if f is not None:
+        try:
+            a, b = segment_bounds(f.frames, f.samplerate, start, end)
+        except ValueError:
+            f.close()
+            raise
+        lo, hi = max(0, a - margin), min(f.frames, b + margin)
+
+        def blocks():
+            with f:
+                f.seek(lo)
+                remaining = hi - lo
+                while remaining > 0:
+                    y = f.read(min(blocksize, remaining), dtype='float32', always_2d=False)
+                    if len(y) == 0:
+                        break
+                    remaining -= len(y)
+                    yield _to_mono(y)
+
+        return f.samplerate, blocks(), (a - lo, hi - b)
+
+    y, sr, margins = load_segment(source, start, end, margin, format=format)
+    return sr, (y[i:i + blocksize] for i in range(0, len(y), blocksize)), margins
+
+
+def slice_with_margin(y, a, b, margin):
+    """
+    Recorta y[a:b] agregando hasta margin muestras de contexto a cada lado.
+
+    Retorna:
+    --------
+    - y_segment (ndarray): Fragmento con contexto (vista, sin copia)
+    - margins (tuple): (antes, después) muestras de contexto incluidas
+    """
+    lo, hi = max(0, a - margin), min(len(y), b + margin)
+    return y[lo:hi], (a - lo, hi - b)
+
+
+def trim_margins(y, margins):
+    """Descarta el contexto (antes, después) de un fragmento leído con load_segment."""
+    before, after = margins
+    return y[before:len(y) - after]
+
+
+# formato -> (formato de soundfile, subtipo, tipo MIME)
+ENCODINGS = {
+    'wav': ('WAV', 'PCM_16', 'audio/wav'),
+    'flac': ('FLAC', 'PCM_16', 'audio/flac'),
+    'ogg': ('OGG', 'VORBIS', 'audio/ogg'),
+}
+
+
+def encode_audio(y, sr, format='wav', blocksize=65536):
+    """
+    Codifica una señal en memoria escribiéndola por bloques.
+
+    Parámetros:
+    -----------
+    - y (ndarray): Señal mono
+    - sr (int): Frecuencia de muestreo
+    - format (str): 'wav', 'flac' u 'ogg'
+    - blocksize (int): Muestras escritas por bloque. Default: 65536
+
+    Retorna:
+    --------
+    - data (bytes): Archivo codificado
+    """
+    if format not in ENCODINGS:
+        raise ValueError(f"Formato '{format}' no soportado")
+    sf_format, subtype, _ = ENCODINGS[format]
+
+    buffer = io.BytesIO()
+    with sf.SoundFile(buffer, 'w', samplerate=sr, channels=1,
+                      format=sf_format, subtype=subtype) as f:
+        for start in range(0, len(y), blocksize):
+            f.write(y[start:start + blocksize])
+
+    return buffer.getvalue()
+
+
+def iter_wav(y, sr, blocksize=65536):
+    """
+    Genera un WAV PCM de 16 bits por partes, sin armar el archivo completo en
+    memoria (la cabecera se calcula de antemano porque se conoce la longitud).
+    Sirve para respuestas HTTP en streaming.
+
+    Parámetros:
+    -----------
+    - y (ndarray): Señal mono en [-1, 1]
+    - sr (int): Frecuencia de muestreo
+    - blocksize (int): Muestras por parte. Default: 65536
+
+    Retorna:
+    --------
+    - chunks (generator de bytes): Cabecera y luego los bloques de muestras
+    """
+    data_bytes = 2 * len(y)
+    yield struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + data_bytes, b'WAVE',
+                      b'fmt ', 16, 1, 1, sr, 2 * sr, 2, 16, b'data', data_bytes)
+    for start in range(0, len(y), blocksize):
+        block = np.clip(np.rint(y[start:start + blocksize] * 32768), -32768, 32767)
+        yield block.astype('<i2').tobytes()
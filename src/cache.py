@@ -0,0 +1,173 @@
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def audio_hash(data):
+    """
+    Calcula un hash de contenido para usar como clave de caché.
+
+    Parámetros:
+    -----------
+    - data (bytes o ndarray): Contenido del archivo de audio o señal
+
+    Retorna:
+    --------
+    - digest (str): Hash SHA-256 en hexadecimal
+    """
+    if isinstance(data, np.ndarray):
+        data = np.ascontiguousarray(data).view(np.uint8)
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_key(path):
+    """
+    Clave barata de un archivo local para el almacén en disco: ruta absoluta,
+    tamaño y fecha de modificación. A diferencia de audio_hash no lee el
+    archivo, así que su costo no depende de la duración del audio.
+
+    Parámetros:
+    -----------
+    - path (str): Ruta del archivo
+
+    Retorna:
+    --------
+    - key (str): Identificador del archivo en su estado actual
+    """
+    info = os.stat(path)
+    return f"{os.path.abspath(path)}:{info.st_size}:{info.st_mtime_ns}"
+
+
+def nbytes_of(value):
+    """Estima el tamaño en bytes de un resultado (arrays, bytes y contenedores)."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(nbytes_of(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes_of(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    """Marca los arrays como solo lectura: el resultado se comparte entre sesiones."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _freeze(v)
+    return value
+
+
+class ResultCache:
+    """
+    Caché de resultados compartida por todo el proceso, con presupuesto de
+    memoria en bytes y desalojo LRU.
+
+    Las sesiones guardan solo la clave; usuarios con el mismo audio y los
+    mismos parámetros comparten una única copia y un único cálculo.
+
+    Parámetros:
+    -----------
+    - max_bytes (int): Presupuesto máximo de memoria en bytes
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Retorna el valor asociado a key (o None) y lo marca como recién usado."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        """
+        Guarda un valor desalojando los menos usados si se supera el presupuesto.
+        Un valor más grande que el presupuesto completo no se guarda.
+        """
+        size = nbytes_of(value)
+        _freeze(value)
+        with self._lock:
+            if key in self._entries:
+                self._total -= self._sizes.pop(key)
+                del self._entries[key]
+            if size > self.max_bytes:
+                return value
+            while self._total + size > self.max_bytes and self._entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._total -= self._sizes.pop(old_key)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._total += size
+        return value
+
+    def get_or_compute(self, key, compute):
+        """
+        Retorna el valor en caché o lo calcula con compute() y lo guarda.
+        Llamadas concurrentes con la misma clave calculan una sola vez.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                # Otra sesión pudo haberlo calculado mientras esperábamos
+                with self._lock:
+                    value = self._entries.get(key)
+                if value is None:
+                    value = self.put(key, compute())
+            finally:
+                # También si compute() falla: si no, el lock de la clave quedaría registrado
+                with self._lock:
+                    self._key_locks.pop(key, None)
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total = 0
+
+    def stats(self):
+        """Retorna un resumen del uso de la caché."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# Caché única por proceso (compartida por todas las sesiones de Streamlit)
+RESULT_CACHE = ResultCache(int(os.environ.get('MAA2_CACHE_MB', 512)) * 1024 ** 2)
@@ -0,0 +1,119 @@
+import numpy as np
+
+from .filters import apply_filter, design_filter
+
+
+class FilterChain:
+    """
+    Cadena de filtros FIR compuesta de antemano para aplicarse en una sola pasada.
+
+    Las cadenas cortas se pre-convolucionan en un único kernel (que se aplica
+    con apply_filter); las largas se multiplican en una única máscara en
+    frecuencia que se aplica con una convolución FFT por bloques (overlap-add).
+    En ambos casos el costo es de una sola pasada de filtrado, sin importar la
+    cantidad de etapas.
+
+    El resultado equivale a convolucionar la señal con todas las etapas en
+    modo 'full' y centrar (como mode='same' con el kernel compuesto). Aplicar
+    las etapas una por una con apply_filter solo difiere en las primeras y
+    últimas num_taps // 2 muestras, porque cada etapa recorta las colas.
+
+    Parámetros:
+    -----------
+    - stages (list, optional): Coeficientes de cada etapa, en orden
+    - max_kernel_taps (int): Longitud máxima del kernel compuesto para usar
+      convolución directa; por encima se usa la máscara espectral. Default: 1024
+    """
+
+    def __init__(self, stages=None, max_kernel_taps=1024):
+        self.stages = [np.asarray(h, dtype=float) for h in (stages or [])]
+        self.max_kernel_taps = max_kernel_taps
+        self._kernel = None
+        self._masks = {}
+
+    @classmethod
+    def from_specs(cls, specs, sr, num_taps=101, window_type='hamming', **kwargs):
+        """
+        Crea una cadena a partir de especificaciones (tipo, cortes), por ejemplo
+        [('highpass', (80,)), ('lowpass', (12000,)), ('bandstop', (950, 1050))].
+        """
+        stages = []
+        for filter_type, cutoffs in specs:
+            stages.append(design_filter(filter_type, cutoffs, sr, num_taps, window_type))
+        return cls(stages, **kwargs)
+
+    def add(self, filter_coeffs):
+        """Agrega una etapa al final de la cadena."""
+        self.stages.append(np.asarray(filter_coeffs, dtype=float))
+        self._kernel = None
+        self._masks = {}
+        return self
+
+    @property
+    def num_taps(self):
+        """Longitud del kernel compuesto."""
+        if not self.stages:
+            return 1
+        return sum(len(h) for h in self.stages) - len(self.stages) + 1
+
+    def kernel(self):
+        """Kernel compuesto: convolución completa de todas las etapas."""
+        if self._kernel is None:
+            kernel = np.ones(1)
+            for h in self.stages:
+                kernel = np.convolve(kernel, h)
+            self._kernel = kernel
+        return self._kernel
+
+    def mask(self, nfft):
+        """Máscara en frecuencia (rfft de nfft puntos): producto de las respuestas de cada etapa."""
+        if nfft not in self._masks:
+            mask = np.ones(nfft // 2 + 1, dtype=complex)
+            for h in self.stages:
+                mask *= np.fft.rfft(h, nfft)
+            self._masks[nfft] = mask
+        return self._masks[nfft]
+
+    def apply(self, signal, engine=None):
+        """
+        Aplica la cadena completa a la señal.
+
+        Parámetros:
+        -----------
+        - signal (ndarray): Señal de entrada
+        - engine (str, optional): Motor de apply_filter para el kernel compuesto
+
+        Retorna:
+        --------
+        - filtered_signal (ndarray): Señal filtrada (misma longitud que la entrada)
+        """
+        if not self.stages:
+            return np.array(signal, copy=True)
+        if self.num_taps <= self.max_kernel_taps or len(signal) < self.num_taps:
+            return apply_filter(signal, self.kernel(), engine)
+        return self._apply_mask(np.asarray(signal))
+
+    def _apply_mask(self, signal):
+        """Overlap-add con la máscara compuesta, procesando todos los bloques en lote."""
+        n = len(signal)
+        taps = self.num_taps
+        nfft = 1 << int(np.ceil(np.log2(4 * taps)))
+        block = nfft - taps + 1
+        n_blocks = -(-n // block)
+
+        blocks = np.zeros((n_blocks, block), dtype=float)
+        blocks.ravel()[:n] = signal
+        spectra = np.fft.rfft(blocks, nfft, axis=-1)
+        spectra *= self.mask(nfft)
+        segments = np.fft.irfft(spectra, nfft, axis=-1)
+        del spectra
+
+        # Cada bloque aporta block muestras propias y una cola de taps - 1 (<= block) al siguiente
+        out = np.zeros((n_blocks + 1) * block)
+        out[:n_blocks * block] += segments[:, :block].ravel()
+        tails = np.zeros((n_blocks, block))
+        tails[:, :taps - 1] = segments[:, block:block + taps - 1]
+        out[block:] += tails.ravel()
+
+        delay = (taps - 1) // 2
+        return out[delay:delay + n]
@@ -0,0 +1,266 @@
+"""
+Selección automática del motor más rápido para filtrar y calcular espectrogramas.
+
+Una calibración corta mide los motores en este equipo y guarda en disco la
+tabla resultante (motor más rápido por tamaño). La calibración nunca se
+ejecuta dentro de una llamada: mientras no haya tabla para este equipo y estas
+versiones de NumPy/SciPy se usa DEFAULT_TABLE. Se calibra explícitamente con
+`python -m src.engines`, o en segundo plano con calibrate_in_background() (la
+app y el servidor lo hacen al iniciar).
+
+Para resultados reproducibles se puede fijar el motor con el parámetro
+`engine`, con set_engine_override() o con las variables de entorno
+MAA2_FILTER_ENGINE / MAA2_SPECTROGRAM_ENGINE.
+
+Uso:
+    python -m src.engines    # recalibra y muestra la tabla
+"""
+import json
+import os
+import platform
+import threading
+import time
+
+import numpy as np
+import scipy
+from scipy import signal as scipy_signal
+
+
+def _convolve_direct(signal, filter_coeffs):
+    if len(signal) < len(filter_coeffs):
+        # np.convolve('same') devolvería len(filter_coeffs) muestras: se recorta
+        # la convolución completa centrada, como hacen fftconvolve y oaconvolve
+        start = (len(filter_coeffs) - 1) // 2
+        return np.convolve(signal, filter_coeffs, mode='full')[start:start + len(signal)]
+    return np.convolve(signal, filter_coeffs, mode='same')
+
+
+def _convolve_fft(signal, filter_coeffs):
+    return scipy_signal.fftconvolve(signal, filter_coeffs, mode='same')
+
+
+def _convolve_overlap_add(signal, filter_coeffs):
+    return scipy_signal.oaconvolve(signal, filter_coeffs, mode='same')
+
+
+def _spectrogram_scipy(signal, sr, nperseg, noverlap):
+    frequencies, times, Sxx = scipy_signal.spectrogram(
+        signal, fs=sr, window='hann', nperseg=nperseg, noverlap=noverlap, scaling='density')
+    return times, frequencies, Sxx
+
+
+def _spectrogram_batch(signal, sr, nperseg, noverlap):
+    from .analysis import compute_spectrograms_batch
+    times, frequencies, Sxx, _ = compute_spectrograms_batch(signal[np.newaxis], sr, nperseg, noverlap)
+    return times, frequencies, Sxx[0]
+
+
+FILTER_ENGINES = {
+    'direct': _convolve_direct,
+    'fft': _convolve_fft,
+    'oa': _convolve_overlap_add,
+}
+
+SPECTROGRAM_ENGINES = {
+    'scipy': _spectrogram_scipy,
+    'batch': _spectrogram_batch,
+}
+
+_ENGINES = {'filter': FILTER_ENGINES, 'spectrogram': SPECTROGRAM_ENGINES}
+_ENV_OVERRIDES = {'filter': 'MAA2_FILTER_ENGINE', 'spectrogram': 'MAA2_SPECTROGRAM_ENGINE'}
+
+# Grilla de calibración: (longitudes de señal, segundo parámetro)
+CALIBRATION_GRID = {
+    'filter': ([2 ** 12, 2 ** 15, 2 ** 18], [15, 51, 101, 201, 501]),
+    'spectrogram': ([2 ** 14, 2 ** 17, 2 ** 20], [256, 1024, 2048]),
+}
+
+TABLE_PATH = os.environ.get(
+    'MAA2_ENGINE_TABLE', os.path.join(os.path.expanduser('~'), '.cache', 'maa2', 'engines.json'))
+
+# Tabla usada mientras no hay calibración para este equipo (medida en un x86-64
+# de 4 núcleos; con otras máquinas puede no ser la óptima, pero sí razonable)
+DEFAULT_TABLE = {
+    'filter': {
+        'lengths': CALIBRATION_GRID['filter'][0],
+        'params': CALIBRATION_GRID['filter'][1],
+        'best': [['direct', 'direct', 'direct', 'direct', 'fft'],
+                 ['direct', 'oa', 'direct', 'oa', 'oa'],
+                 ['oa', 'oa', 'oa', 'oa', 'oa']],
+    },
+    'spectrogram': {
+        'lengths': CALIBRATION_GRID['spectrogram'][0],
+        'params': CALIBRATION_GRID['spectrogram'][1],
+        'best': [['scipy'] * 3] * 3,
+    },
+}
+
+_overrides = {}
+_table = None
+_table_loaded = False
+_lock = threading.Lock()
+
+
+def set_engine_override(kind, name):
+    """
+    Fija el motor a usar para 'filter' o 'spectrogram' (None vuelve a la selección automática).
+    """
+    if name is not None and name not in _ENGINES[kind]:
+        raise ValueError(f"Motor '{name}' no reconocido para '{kind}'")
+    _overrides[kind] = name
+
+
+def _host_id():
+    """
+    Identifica el tipo de equipo y las versiones: si cambian, la tabla deja
+    de usarse. No incluye el nombre del host, que cambia en cada contenedor.
+    """
+    return {
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+    }
+
+
+def _time_call(fn, *args, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def calibrate(path=TABLE_PATH):
+    """
+    Mide cada motor sobre la grilla de calibración y guarda la tabla en path.
+
+    Retorna:
+    --------
+    - table (dict): Motor más rápido por punto de la grilla, y tiempos medidos
+    """
+    rng = np.random.default_rng(0)
+    table = {'host': _host_id()}
+
+    lengths, taps = CALIBRATION_GRID['filter']
+    best, times = [], []
+    for n in lengths:
+        x = rng.standard_normal(n).astype(np.float32)
+        row_best, row_times = [], []
+        for m in taps:
+            h = rng.standard_normal(m)
+            measured = {name: _time_call(fn, x, h) for name, fn in FILTER_ENGINES.items()}
+            row_best.append(min(measured, key=measured.get))
+            row_times.append(measured)
+        best.append(row_best)
+        times.append(row_times)
+    table['filter'] = {'lengths': lengths, 'params': taps, 'best': best, 'times': times}
+
+    lengths, npersegs = CALIBRATION_GRID['spectrogram']
+    best, times = [], []
+    for n in lengths:
+        x = rng.standard_normal(n).astype(np.float32)
+        row_best, row_times = [], []
+        for nperseg in npersegs:
+            measured = {name: _time_call(fn, x, 44100, nperseg, nperseg // 2, repeats=2)
+                        for name, fn in SPECTROGRAM_ENGINES.items()}
+            row_best.append(min(measured, key=measured.get))
+            row_times.append(measured)
+        best.append(row_best)
+        times.append(row_times)
+    table['spectrogram'] = {'lengths': lengths, 'params': npersegs, 'best': best, 'times': times}
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(table, f, indent=1)
+    except OSError as e:
+        print(f"Advertencia: no se pudo guardar la tabla de motores en {path}: {e}")
+
+    return table
+
+
+def load_table(path=TABLE_PATH):
+    """Carga la tabla de calibración (None si no existe o es de otro equipo o versiones)."""
+    global _table, _table_loaded
+    with _lock:
+        if not _table_loaded:
+            try:
+                with open(path) as f:
+                    table = json.load(f)
+                if table.get('host') != _host_id():
+                    table = None
+            except (OSError, ValueError):
+                table = None
+            _table, _table_loaded = table, True
+        return _table
+
+
+def calibrate_in_background(path=TABLE_PATH):
+    """
+    Si no hay tabla de calibración válida, calibra en un hilo aparte y la usa
+    al terminar; hasta entonces se despacha con DEFAULT_TABLE. Los tiempos
+    medidos pueden verse afectados por lo que se procese a la vez.
+
+    Retorna:
+    --------
+    - thread (Thread o None): Hilo de la calibración, o None si no hacía falta
+    """
+    if load_table(path) is not None:
+        return None
+
+    def run():
+        global _table
+        table = calibrate(path)
+        with _lock:
+            _table = table
+
+    thread = threading.Thread(target=run, name='calibracion', daemon=True)
+    thread.start()
+    return thread
+
+
+def _nearest(grid, value):
+    """Índice del punto de la grilla más cercano en escala logarítmica."""
+    return int(np.argmin(np.abs(np.log(np.asarray(grid, dtype=float)) - np.log(max(value, 1)))))
+
+
+def select_engine(kind, length, param):
+    """
+    Retorna el nombre del motor a usar para 'filter' (param = num_taps) o
+    'spectrogram' (param = nperseg) con una señal de la longitud dada.
+    """
+    name = _overrides.get(kind) or os.environ.get(_ENV_OVERRIDES[kind])
+    if name:
+        if name not in _ENGINES[kind]:
+            raise ValueError(f"Motor '{name}' no reconocido para '{kind}'")
+        return name
+
+    entry = (load_table() or DEFAULT_TABLE)[kind]
+    return entry['best'][_nearest(entry['lengths'], length)][_nearest(entry['params'], param)]
+
+
+def filter_engine(signal, filter_coeffs, engine=None):
+    """Retorna la función de convolución a usar para esta señal y este filtro."""
+    if engine is None:
+        engine = select_engine('filter', len(signal), len(filter_coeffs))
+    return FILTER_ENGINES[engine]
+
+
+def spectrogram_engine(signal, nperseg, engine=None):
+    """Retorna la función de espectrograma a usar para esta señal."""
+    if engine is None:
+        engine = select_engine('spectrogram', len(signal), nperseg)
+    return SPECTROGRAM_ENGINES[engine]
+
+
+if __name__ == '__main__':
+    table = calibrate()
+    print(f"Tabla guardada en {TABLE_PATH}")
+    for kind, label in (('filter', 'num_taps'), ('spectrogram', 'nperseg')):
+        entry = table[kind]
+        print(f"\n{kind} (filas: longitud, columnas: {label})")
+        print('          ' + ''.join(f"{p:>8}" for p in entry['params']))
+        for n, row in zip(entry['lengths'], entry['best']):
+            print(f"{n:>10}" + ''.join(f"{name:>8}" for name in row))
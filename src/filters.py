@@ -115,7 +115,76 @@ def bandpass_fir(fc_low, fc_high, fs, num_taps=101, window_type='hamming'):
     
     return h_bp
 
-def apply_filter(signal, filter_coeffs):
+def bandstop_fir(fc_low, fc_high, fs, num_taps=101, window_type='hamming'):
+	"""
+	Filtro FIR rechaza banda (corte de banda) usando el método de ventana.
+	Suma un paso bajo en fc_low y un paso alto en fc_high.
+
+	Parámetros
+	----------
+	- fc_low (float): Frecuencia inferior de la banda eliminada en Hz
+	- fc_high (float): Frecuencia superior de la banda eliminada en Hz
+	- fs (float): Frecuencia de muestreo en Hz
+	- num_taps (int): Longitud del filtro (impar)
+	- window_type (str): Tipo de ventana: 'hamming', 'blackman', 'hann', 'rectangular'
+
+	Devuelve
+	----------
+	- h (ndarray): Respuesta al impulso del filtro rechaza banda
+	"""
+	if fc_low >= fc_high:
+		print("Error: fc_low debe ser menor que fc_high")
+		return None
+
+	if num_taps % 2 == 0:
+		num_taps += 1
+
+	h_low = lowpass_fir(fc_low, fs, num_taps, window_type)
+	h_high = highpass_fir(fc_high, fs, num_taps, window_type)
+
+	return h_low + h_high
+
+def design_filter(filter_type, cutoffs, fs, num_taps=101, window_type='hamming'):
+	"""
+	Diseña un filtro FIR a partir de su tipo y frecuencias de corte
+
+	Parámetros
+	----------
+	- filter_type (str): 'lowpass', 'highpass', 'bandpass' o 'bandstop'
+	- cutoffs (tuple): (fc,) o (fc_low, fc_high) para paso/rechaza banda, en Hz
+	- fs (float): Frecuencia de muestreo en Hz
+	- num_taps (int): Longitud del filtro
+	- window_type (str): Tipo de ventana
+
+	Devuelve
+	----------
+	- h (ndarray): Respuesta al impulso del filtro
+
+	Lanza ValueError si el tipo no existe, num_taps es menor a 1, alguna
+	frecuencia de corte no está entre 0 y fs/2 (excluidos) o la inferior no
+	es menor a la superior.
+	"""
+	if num_taps < 1:
+		raise ValueError(f"num_taps debe ser al menos 1 (recibido: {num_taps})")
+	for fc in cutoffs:
+		# not (...) también rechaza NaN
+		if not (0 < fc < fs / 2):
+			raise ValueError(f"La frecuencia de corte debe estar entre 0 y {fs / 2:g} Hz (recibido: {fc})")
+	if filter_type == 'lowpass':
+		h = lowpass_fir(cutoffs[0], fs, num_taps, window_type)
+	elif filter_type == 'highpass':
+		h = highpass_fir(cutoffs[0], fs, num_taps, window_type)
+	elif filter_type == 'bandpass':
+		h = bandpass_fir(cutoffs[0], cutoffs[1], fs, num_taps, window_type)
+	elif filter_type == 'bandstop':
+		h = bandstop_fir(cutoffs[0], cutoffs[1], fs, num_taps, window_type)
+	else:
+		raise ValueError(f"Tipo de filtro '{filter_type}' no reconocido")
+	if h is None:
+		raise ValueError("La frecuencia inferior de corte debe ser menor a la superior")
+	return h
+
+def apply_filter(signal, filter_coeffs, engine=None):
 	"""
 	Aplica un filtro FIR a una señal usando convolución
 
@@ -123,9 +192,168 @@ def apply_filter(signal, filter_coeffs):
 	----------
 	- signal (ndarray): Señal de entrada
 	- filter_coeffs (ndarray): Coeficientes del filtro
+	- engine (str, optional): 'direct', 'fft' u 'oa'. Default: el más rápido
+	  según la calibración del equipo (ver src/engines.py)
 
 	Devuelve
 	----------
 	- filtered_signal (ndarray): Señal filtrada (misma longitud que la entrada)
 	"""
-	return np.convolve(signal, filter_coeffs, mode='same')
\ No newline at end of file
+	from .engines import filter_engine
+
+	return filter_engine(signal, filter_coeffs, engine)(signal, filter_coeffs)
+
+def apply_filter_segment(signal, filter_coeffs, margins, engine=None):
+	"""
+	Filtra un fragmento que incluye contexto a cada lado y descarta el contexto.
+	Con margins >= len(filter_coeffs) // 2 (o en los bordes del archivo) el
+	resultado coincide muestra a muestra con filtrar la señal completa y recortar.
+
+	Parámetros
+	----------
+	- signal (ndarray): Fragmento con contexto (por ejemplo, de load_segment)
+	- filter_coeffs (ndarray): Coeficientes del filtro
+	- margins (tuple): (antes, después) muestras de contexto incluidas en signal
+	- engine (str, optional): Motor de apply_filter
+
+	Devuelve
+	----------
+	- filtered_signal (ndarray): Fragmento filtrado, sin el contexto
+	"""
+	before, after = margins
+	filtered = apply_filter(signal, filter_coeffs, engine)
+	return filtered[before:len(filtered) - after]
+
+def stream_filter(blocks, filter_coeffs, engine=None, margins=(0, 0)):
+	"""
+	Filtra una señal que llega por bloques consecutivos (por ejemplo, leída de
+	disco) sin tenerla completa en memoria. Concatenando los bloques de salida
+	se obtiene lo mismo que apply_filter sobre la señal completa.
+
+	Los bloques de salida no coinciden uno a uno con los de entrada: el primero
+	sale len(filter_coeffs) // 2 muestras más corto y la cola se entrega al final.
+
+	Con margins, los bloques incluyen contexto a cada lado (como en
+	apply_filter_segment): se usa como historia del filtro en lugar de ceros
+	y no aparece en la salida.
+
+	Parámetros
+	----------
+	- blocks (iterable de ndarray): Bloques consecutivos de la señal
+	- filter_coeffs (ndarray): Coeficientes del filtro (longitud impar)
+	- engine (str, optional): Motor de apply_filter
+	- margins (tuple): (antes, después) muestras de contexto incluidas en los
+	  bloques, como mucho len(filter_coeffs) // 2 cada una. Default: (0, 0)
+
+	Devuelve
+	----------
+	- filtered_blocks (generator de ndarray): Bloques consecutivos de la señal filtrada
+	"""
+	taps = len(filter_coeffs)
+	half = taps // 2
+
+	def valid(segment):
+		# Parte 'valid' de la convolución, calculada con apply_filter ('same')
+		return apply_filter(segment, filter_coeffs, engine)[half:len(segment) - half]
+
+	# La señal se rellena con ceros hasta half muestras a cada lado, como hace
+	# mode='same' (el contexto ocupa parte de ese relleno)
+	before, after = margins
+	carry = np.zeros(half - before)
+	for block in blocks:
+		segment = np.concatenate([carry, block])
+		if len(segment) >= taps:
+			yield valid(segment)
+		carry = segment[max(0, len(segment) - (taps - 1)):]
+
+	segment = np.concatenate([carry, np.zeros(half - after)])
+	if len(segment) >= taps:
+		yield valid(segment)
+
+def decimation_factor(fs, f_max, margin=1.25):
+	"""
+	Mayor factor entero de decimación que conserva el contenido hasta f_max,
+	dejando la nueva frecuencia de Nyquist al menos margin veces por encima.
+
+	Parámetros
+	----------
+	- fs (float): Frecuencia de muestreo en Hz
+	- f_max (float): Frecuencia máxima que se quiere conservar en Hz
+	- margin (float): Relación mínima entre la nueva Nyquist y f_max. Default: 1.25
+
+	Devuelve
+	----------
+	- factor (int): Factor de decimación (1 si no conviene decimar)
+	"""
+	if f_max is None or f_max <= 0:
+		return 1
+	return max(1, int(fs // (2 * f_max * margin)))
+
+def decimation_filter(fs, factor, f_max=None, window_type='blackman'):
+	"""
+	Filtro anti-alias de decimate: paso bajo con el corte a mitad de camino
+	entre f_max y la nueva frecuencia de Nyquist, con los coeficientes justos
+	para que la transición quepa en ese espacio.
+
+	Parámetros
+	----------
+	- fs (float): Frecuencia de muestreo en Hz
+	- factor (int): Factor de decimación
+	- f_max (float, optional): Frecuencia máxima a conservar. Default: 80% de la nueva Nyquist
+	- window_type (str): Tipo de ventana. Default: 'blackman'
+
+	Devuelve
+	----------
+	- h (ndarray): Respuesta al impulso del filtro (longitud impar)
+	"""
+	new_nyquist = fs / factor / 2
+	if f_max is None:
+		f_max = 0.8 * new_nyquist
+	# Ancho de la transición de la ventana de Blackman: ~5.5 fs / num_taps
+	gap = max(new_nyquist - f_max, 1e-3 * new_nyquist)
+	num_taps = int(np.ceil(5.5 * fs / gap)) | 1
+	return lowpass_fir((f_max + new_nyquist) / 2, fs, num_taps, window_type)
+
+def decimate(signal, fs, factor, f_max=None, window_type='blackman'):
+	"""
+	Decimación polifásica: filtro anti-alias (lowpass_fir) y submuestreo en
+	una sola operación con scipy.signal.upfirdn, que solo calcula las muestras
+	que se conservan.
+
+	La salida queda alineada con la entrada como en apply_filter: la muestra k
+	corresponde a la muestra k * factor de la señal original.
+
+	Parámetros
+	----------
+	- signal (ndarray): Señal de entrada (o señales apiladas en el último eje)
+	- fs (float): Frecuencia de muestreo en Hz
+	- factor (int): Factor de decimación
+	- f_max (float, optional): Frecuencia máxima a conservar intacta. Default:
+	  80% de la nueva frecuencia de Nyquist
+	- window_type (str): Ventana del filtro anti-alias. Default: 'blackman'
+
+	Devuelve
+	----------
+	- decimated (ndarray): Señal decimada (ceil(len / factor) muestras)
+	- new_fs (float): Nueva frecuencia de muestreo
+	"""
+	from scipy.signal import upfirdn
+
+	if factor <= 1:
+		return signal, fs
+
+	h = decimation_filter(fs, factor, f_max, window_type)
+	num_taps = len(h)
+
+	# upfirdn calcula (signal * h)[k * factor]: se antepone el relleno justo
+	# para que la salida quede centrada (retardo (num_taps - 1) // 2)
+	delay = (num_taps - 1) // 2
+	pad = -delay % factor
+	signal = np.asarray(signal)
+	if pad:
+		padding = [(0, 0)] * (signal.ndim - 1) + [(pad, 0)]
+		signal = np.pad(signal, padding)
+	n_out = -(-(signal.shape[-1] - pad) // factor)
+	first = (delay + pad) // factor
+	decimated = upfirdn(h, signal, up=1, down=factor, axis=-1)
+	return decimated[..., first:first + n_out], fs / factor
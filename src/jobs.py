@@ -0,0 +1,162 @@
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+
+class JobCancelled(Exception):
+    """Se lanza dentro de un trabajo cuando fue cancelado."""
+
+
+class Job:
+    """
+    Trabajo enviado al JobExecutor.
+
+    Atributos:
+    ----------
+    - id (int): Identificador del trabajo
+    - key (hashable): Clave de los parámetros (trabajos iguales se comparten)
+    - stage (str): Etapa actual reportada por el trabajo
+    - progress (float): Avance entre 0 y 1
+    """
+
+    def __init__(self, job_id, key):
+        self.id = job_id
+        self.key = key
+        self.stage = 'en cola'
+        self.progress = 0.0
+        self.future = None
+        self.refs = 1
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    def report(self, stage, progress):
+        """Callback de progreso: actualiza la etapa y aborta si se canceló."""
+        if self._cancel.is_set():
+            raise JobCancelled(self.key)
+        self.stage = stage
+        self.progress = progress
+
+    def cancel(self):
+        """Cancela el trabajo: si no empezó, no se ejecuta; si corre, se aborta en la próxima etapa."""
+        self._cancel.set()
+        self.future.cancel()
+
+    @property
+    def status(self):
+        """'pending', 'running', 'done', 'cancelled' o 'error'."""
+        if self._cancel.is_set() or self.future.cancelled():
+            return 'cancelled'
+        if not self.future.done():
+            return 'running' if self.future.running() else 'pending'
+        exc = self.future.exception()
+        if isinstance(exc, JobCancelled):
+            return 'cancelled'
+        return 'error' if exc is not None else 'done'
+
+    def result(self):
+        return self.future.result()
+
+    def error(self):
+        try:
+            return self.future.exception(timeout=0)
+        except (CancelledError, TimeoutError):
+            return None
+
+
+class JobExecutor:
+    """
+    Ejecuta trabajos de análisis fuera del hilo del script de Streamlit.
+
+    Usa un pool de hilos: convolución, FFT y STFT de NumPy/SciPy liberan el
+    GIL, y así los resultados no se copian entre procesos. Los trabajos con la
+    misma clave se comparten mientras estén activos.
+
+    Los trabajos terminados quedan registrados hasta que alguien los quite con
+    pop(). Si quien lo envió no vuelve a consultarlo (por ejemplo, se cerró la
+    pestaña), se descartan los más viejos por encima de max_finished o los que
+    llevan más de finished_ttl segundos terminados.
+
+    Parámetros:
+    -----------
+    - max_workers (int, optional): Cantidad de trabajos en paralelo
+    - max_finished (int, optional): Trabajos terminados que se conservan.
+      Default: sin límite
+    - finished_ttl (float, optional): Segundos que se conserva un trabajo
+      terminado. Default: sin límite
+    """
+
+    def __init__(self, max_workers=None, max_finished=None, finished_ttl=None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1),
+                                        thread_name_prefix='analisis')
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        Envía fn(*args, progress=job.report, **kwargs) como trabajo.
+        Si ya hay un trabajo activo con la misma clave, retorna ese.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.status in ('pending', 'running'):
+                    job.refs += 1
+                    return job
+            job = Job(next(self._ids), key)
+            job.future = self._pool.submit(fn, *args, progress=job.report, **kwargs)
+            self._jobs[job.id] = job
+        # Fuera del lock: si el trabajo ya terminó, el callback se ejecuta acá mismo
+        job.future.add_done_callback(lambda _: self._finished(job))
+        return job
+
+    def _finished(self, job):
+        """Registra el fin del trabajo y descarta los terminados que sobran."""
+        job.finished_at = time.monotonic()
+        with self._lock:
+            finished = sorted((j for j in self._jobs.values() if j.finished_at is not None),
+                              key=lambda j: j.finished_at)
+            if self.finished_ttl is not None:
+                expired = [j for j in finished if job.finished_at - j.finished_at > self.finished_ttl]
+                finished = finished[len(expired):]
+                for old in expired:
+                    del self._jobs[old.id]
+            if self.max_finished is not None:
+                for old in finished[:max(0, len(finished) - self.max_finished)]:
+                    del self._jobs[old.id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Abandona un trabajo; se cancela cuando ninguna sesión lo espera."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.refs -= 1
+            if job.refs > 0:
+                return
+            del self._jobs[job_id]
+        job.cancel()
+
+    def pop(self, job_id):
+        """Quita el trabajo del registro (por ejemplo, luego de recoger su resultado)."""
+        with self._lock:
+            return self._jobs.pop(job_id, None)
+
+    def shutdown(self, wait=True):
+        for job in list(self._jobs.values()):
+            job.cancel()
+        self._pool.shutdown(wait=wait)
+
+
+# Pool único por proceso, compartido por las sesiones de Streamlit. Una sesión
+# recoge su resultado en la siguiente ejecución del script; lo que quede sin
+# recoger (pestañas cerradas) se descarta para no retener memoria fuera del
+# presupuesto de RESULT_CACHE
+JOB_EXECUTOR = JobExecutor(max_finished=16, finished_ttl=600)
@@ -0,0 +1,138 @@
+import numpy as np
+
+from .filters import design_filter, apply_filter_segment
+from .analysis import calculate_fft, compute_spectrograms_batch, spectral_summary
+from .audio_io import load_segment, trim_margins
+from .store import store_key
+
+# Etapas del análisis completo, en orden
+STAGES = ('diseño', 'filtrado', 'fft', 'espectrogramas')
+
+# Parámetros de la STFT del análisis completo
+NPERSEG = 2048
+NOVERLAP = NPERSEG // 2
+
+# Frecuencia máxima que muestra la interfaz: FFT y espectrogramas se calculan
+# sobre la señal decimada cuando está bastante por debajo de Nyquist
+F_MAX = 10000
+
+
+def run_analysis(y, sr, filter_type, cutoffs, num_taps=101, progress=None, margins=(0, 0)):
+    """
+    Ejecuta el análisis completo: diseño, filtrado, FFT y espectrogramas.
+
+    Parámetros:
+    -----------
+    - y (ndarray): Señal original
+    - sr (float): Frecuencia de muestreo
+    - filter_type (str): 'lowpass', 'highpass' o 'bandpass'
+    - cutoffs (tuple): Frecuencias de corte en Hz
+    - num_taps (int): Longitud del filtro
+    - progress (callable, optional): progress(etapa, fraccion) se llama al
+      comenzar cada etapa; puede lanzar una excepción para cancelar
+    - margins (tuple): (antes, después) muestras de contexto incluidas en y
+      para filtrar un fragmento (ver load_segment). Se descartan del resultado
+
+    Retorna:
+    --------
+    - result (dict): h, y_filtered, fft (freqs, mag_orig_db, mag_filt_db) y
+      spectrogram (times, freqs, Sxx_orig_db, Sxx_filt_db)
+    """
+    def report(i):
+        if progress is not None:
+            progress(STAGES[i], i / len(STAGES))
+
+    report(0)
+    h = design_filter(filter_type, cutoffs, sr, num_taps)
+
+    report(1)
+    y_filtered = apply_filter_segment(y, h, margins)
+    y = trim_margins(y, margins)
+
+    report(2)
+    freqs, _, mag_orig_db = calculate_fft(y, sr, F_MAX)
+    _, _, mag_filt_db = calculate_fft(y_filtered, sr, F_MAX)
+
+    report(3)
+    times, freqs_spec, _, Sxx_db = compute_spectrograms_batch(
+        np.stack([y, y_filtered]), sr, NPERSEG, NOVERLAP, keep_power=False, f_max=F_MAX)
+
+    if progress is not None:
+        progress('listo', 1.0)
+
+    return {
+        'h': h,
+        'y_filtered': y_filtered,
+        'fft': (freqs, mag_orig_db, mag_filt_db),
+        'spectrogram': (times, freqs_spec, Sxx_db[0], Sxx_db[1]),
+    }
+
+
+def cached_analysis(store, audio_key, y, sr, filter_type, cutoffs, num_taps=101, progress=None,
+                    margins=(0, 0), segment=None):
+    """
+    Igual que run_analysis, pero reutiliza el resultado guardado en el almacén
+    en disco (AnalysisStore) si ya se calculó para este audio y estos parámetros.
+
+    Parámetros:
+    -----------
+    - store (AnalysisStore): Almacén de resultados
+    - audio_key (str): Hash del contenido del audio
+    - segment (tuple, optional): Rango (a, b) en muestras analizado, parte de la clave
+    - (resto): Ver run_analysis
+
+    Retorna:
+    --------
+    - result (dict): Ver run_analysis (con arrays memory-mapped si vino del disco)
+    """
+    key = store_key('analisis', audio_key, filter_type, cutoffs, num_taps, segment,
+                    {'nperseg': NPERSEG, 'noverlap': NOVERLAP, 'f_max': F_MAX})
+    return store.get_or_compute(
+        key, lambda: run_analysis(y, sr, filter_type, cutoffs, num_taps, progress, margins))
+
+
+def process_audio(source, filter_type, cutoffs, num_taps=101, start=None, end=None,
+                  format=None, progress=None):
+    """
+    Decodifica (solo el fragmento pedido), filtra y resume un archivo de audio.
+    Es el procesamiento que expone el servicio HTTP (server.py).
+
+    Parámetros:
+    -----------
+    - source (str, bytes o archivo binario): Audio a procesar
+    - filter_type (str): 'lowpass', 'highpass', 'bandpass' o 'bandstop'
+    - cutoffs (tuple): Frecuencias de corte en Hz
+    - num_taps (int): Longitud del filtro
+    - start, end (float, optional): Fragmento a procesar, en segundos
+    - format (str, optional): Formato del audio. Default: según la extensión
+    - progress (callable, optional): Ver run_analysis
+
+    Retorna:
+    --------
+    - result (dict): y_filtered, sr, h y summary (freqs, psd_orig_db, psd_filt_db)
+    """
+    def report(stage, fraction):
+        if progress is not None:
+            progress(stage, fraction)
+
+    report('decodificación', 0.0)
+    # El filtro siempre tiene longitud impar (num_taps o num_taps + 1): su mitad es num_taps // 2
+    y_context, sr, margins = load_segment(source, start, end, margin=num_taps // 2, format=format)
+
+    report('diseño', 0.25)
+    h = design_filter(filter_type, cutoffs, sr, num_taps)
+
+    report('filtrado', 0.5)
+    y_filtered = apply_filter_segment(y_context, h, margins)
+    y = trim_margins(y_context, margins)
+
+    report('resumen', 0.75)
+    freqs, (psd_orig_db, psd_filt_db) = spectral_summary(np.stack([y, y_filtered]), sr)
+    report('listo', 1.0)
+
+    return {
+        'y_filtered': y_filtered,
+        'sr': sr,
+        'h': h,
+        'summary': (freqs, psd_orig_db, psd_filt_db),
+    }
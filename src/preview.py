@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+
+from .filters import apply_filter, design_filter
+from .analysis import zoom_filter_response, spectral_summary
+
+
+def preview_excerpt(y, sr, seconds=3.0):
+    """
+    Toma un fragmento central de la señal para la vista previa.
+
+    Parámetros:
+    -----------
+    - y (ndarray): Señal completa
+    - sr (float): Frecuencia de muestreo
+    - seconds (float): Duración máxima del fragmento. Default: 3.0
+
+    Retorna:
+    --------
+    - excerpt (ndarray): Fragmento de la señal (vista, sin copia)
+    """
+    n = min(len(y), int(seconds * sr))
+    start = (len(y) - n) // 2
+    return y[start:start + n]
+
+
+def preview_analysis(y, sr, filter_type, cutoffs, num_taps=101, seconds=3.0,
+                     f_max=10000, num_points=512):
+    """
+    Análisis aproximado y rápido para mostrar mientras se mueven los controles:
+    filtra solo un fragmento corto y resume los espectros con Welch.
+
+    Parámetros:
+    -----------
+    - y (ndarray): Señal completa
+    - sr (float): Frecuencia de muestreo
+    - filter_type (str): 'lowpass', 'highpass' o 'bandpass'
+    - cutoffs (tuple): Frecuencias de corte en Hz
+    - num_taps (int): Longitud del filtro
+    - seconds (float): Duración del fragmento analizado. Default: 3.0
+    - f_max (float): Frecuencia máxima de la respuesta del filtro. Default: 10000
+    - num_points (int): Puntos de la respuesta del filtro. Default: 512
+
+    Retorna:
+    --------
+    - preview (dict): h, response (freqs, magnitude_db), spectrum
+      (freqs, psd_orig_db, psd_filt_db) y elapsed (segundos)
+    """
+    start = time.perf_counter()
+
+    h = design_filter(filter_type, cutoffs, sr, num_taps)
+
+    response = zoom_filter_response(h, sr, 0, min(f_max, sr / 2), num_points)
+
+    excerpt = preview_excerpt(y, sr, seconds)
+    excerpt_filtered = apply_filter(excerpt, h)
+
+    # Welch promedia segmentos cortos: pocos puntos, listos para graficar
+    freqs, (psd_orig_db, psd_filt_db) = spectral_summary(np.stack([excerpt, excerpt_filtered]), sr)
+
+    return {
+        'h': h,
+        'response': response,
+        'spectrum': (freqs, psd_orig_db, psd_filt_db),
+        'elapsed': time.perf_counter() - start,
+    }
@@ -0,0 +1,333 @@
+"""
+Perfil de memoria del pipeline: pico de tracemalloc, memoria retenida y
+tamaño de los arrays vivos en cada etapa (decodificación, diseño, filtrado,
+FFT, STFT y gráficos).
+
+Sirve para saber qué intermedios dominan y cuánta memoria necesita un worker
+por minuto de audio. tracemalloc hace todo más lento: usar solo para medir.
+
+tracemalloc es global al proceso: los picos incluyen lo que asignen otros
+hilos mientras se mide (por ejemplo, los análisis en segundo plano de la
+app). Los perfiles comparten el rastreo contando cuántos lo usan, y
+profile_pipeline mide de a uno por proceso para no mezclar sus picos.
+
+Uso:
+    python main.py --profile-memory
+    python -m src.profiling audio.wav --fc 3000
+"""
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager, nullcontext
+from io import BytesIO
+
+import numpy as np
+
+MB = 1024 ** 2
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cuadros guardados por asignación: alcanzan para llegar desde NumPy al código del proyecto
+TRACE_FRAMES = 25
+
+# Perfiles que están usando tracemalloc: se detiene cuando termina el último
+# (solo si lo inició este módulo y no otro código)
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+# Un profile_pipeline a la vez por proceso (reset_peak afecta a todos los perfiles)
+PROFILE_LOCK = threading.Lock()
+
+
+def _owned_arrays(value):
+    """Arrays con memoria propia dentro de value (las vistas no suman)."""
+    if isinstance(value, np.ndarray):
+        # Sube hasta el array dueño de los datos (los memory-mapped no se cuentan)
+        while isinstance(value.base, np.ndarray):
+            value = value.base
+        return [] if isinstance(value, np.memmap) or value.base is not None else [value]
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        return [a for v in value for a in _owned_arrays(v)]
+    return []
+
+
+def _sites(snapshot, min_size):
+    """
+    Suma el tamaño de las asignaciones de al menos min_size bytes por la línea
+    del proyecto que las originó (la más interna fuera de las bibliotecas),
+    con la línea exacta de la asignación entre paréntesis si es otra.
+    """
+    sites = {}
+    for trace in snapshot.traces:
+        if trace.size < min_size:
+            continue
+        # Los cuadros van del más externo al más interno (donde se asignó la memoria)
+        leaf = trace.traceback[-1]
+        own = next((f for f in reversed(trace.traceback) if f.filename.startswith(_ROOT)), None)
+        label = f"{os.path.basename(leaf.filename)}:{leaf.lineno}"
+        if own == leaf:
+            label = f"{os.path.relpath(own.filename, _ROOT)}:{own.lineno}"
+        elif own is not None:
+            label = f"{os.path.relpath(own.filename, _ROOT)}:{own.lineno} ({label})"
+        sites[label] = sites.get(label, 0) + trace.size
+    return sites
+
+
+class MemoryProfiler:
+    """
+    Registra el uso de memoria de cada etapa con tracemalloc.
+
+    Por etapa se guarda el pico por encima de la memoria al comenzar (incluye
+    los intermedios que se liberan antes de terminar), la memoria retenida al
+    terminar, las líneas que más memoria retienen y los arrays registrados con
+    track() que siguen vivos. Varios perfiles pueden estar activos a la vez:
+    tracemalloc se detiene cuando termina el último que lo usa.
+
+    Parámetros:
+    -----------
+    - enabled (bool): Si es False, stage() y track() no hacen nada. Default: True
+    - top (int): Líneas de código a listar por etapa. Default: 3
+    - min_size (int): Tamaño mínimo de una asignación para atribuirla a una
+      línea (las pequeñas solo cuentan en los totales). Default: 256 KB
+    """
+
+    def __init__(self, enabled=True, top=3, min_size=256 * 1024):
+        self.enabled = enabled
+        self.top = top
+        self.min_size = min_size
+        self.stages = []
+        self.samples = None
+        self.sr = None
+        self._tracked = []
+        self._started = False
+
+    def start(self):
+        global _tracing_users, _tracing_owned
+        if self.enabled and not self._started:
+            with _tracing_lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(TRACE_FRAMES)
+                    _tracing_owned = True
+                _tracing_users += 1
+            self._started = True
+        return self
+
+    def stop(self):
+        global _tracing_users, _tracing_owned
+        if self._started:
+            with _tracing_lock:
+                _tracing_users -= 1
+                if _tracing_users == 0 and _tracing_owned:
+                    tracemalloc.stop()
+                    _tracing_owned = False
+            self._started = False
+
+    def track(self, name, value):
+        """Registra los arrays de value (array, tupla o dict) para seguir si quedan vivos."""
+        if self.enabled:
+            for array in _owned_arrays(value):
+                self._tracked.append((name, weakref.ref(array), array.nbytes))
+        return value
+
+    def set_signal(self, samples, sr):
+        """Longitud de la señal analizada, para expresar la memoria por minuto de audio."""
+        self.samples, self.sr = samples, sr
+
+    def live_arrays(self):
+        """Arrays registrados que siguen vivos: {nombre: bytes}."""
+        live = {}
+        seen = set()
+        for name, ref, nbytes in self._tracked:
+            array = ref()
+            if array is not None and id(array) not in seen:
+                seen.add(id(array))
+                live[name] = live.get(name, 0) + nbytes
+        return live
+
+    def stage(self, name):
+        """Contexto que mide una etapa (nullcontext si el perfil está desactivado)."""
+        if not self.enabled:
+            return nullcontext()
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name):
+        self.start()
+        before = _sites(tracemalloc.take_snapshot(), self.min_size) if self.top else None
+        current_before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            sites = []
+            if self.top:
+                after = _sites(tracemalloc.take_snapshot(), self.min_size)
+                diff = {label: size - before.get(label, 0) for label, size in after.items()}
+                sites = sorted(((label, size) for label, size in diff.items() if size > 0),
+                               key=lambda item: -item[1])[:self.top]
+            self.stages.append({
+                'stage': name,
+                'peak': peak - current_before,
+                'retained': current - current_before,
+                'total_peak': peak,
+                'seconds': elapsed,
+                'live': self.live_arrays(),
+                'sites': sites,
+            })
+
+    def rows(self):
+        """Una fila por etapa con los valores en MB, para mostrar como tabla."""
+        return [{
+            'etapa': s['stage'],
+            'pico (MB)': round(s['peak'] / MB, 1),
+            'transitorio (MB)': round((s['peak'] - max(s['retained'], 0)) / MB, 1),
+            'retenido (MB)': round(s['retained'] / MB, 1),
+            'total pico (MB)': round(s['total_peak'] / MB, 1),
+            'arrays vivos (MB)': round(sum(s['live'].values()) / MB, 1),
+            'tiempo (s)': round(s['seconds'], 3),
+        } for s in self.stages]
+
+    def report(self):
+        """Reporte de texto: tabla por etapa, arrays vivos y líneas que más retienen."""
+        lines = [f"{'etapa':<16}{'pico':>10}{'transit.':>10}{'retenido':>10}{'total':>10}{'vivos':>10}  (MB)"]
+        for s in self.stages:
+            lines.append(f"{s['stage']:<16}{s['peak'] / MB:>10.1f}"
+                         f"{(s['peak'] - max(s['retained'], 0)) / MB:>10.1f}"
+                         f"{s['retained'] / MB:>10.1f}{s['total_peak'] / MB:>10.1f}"
+                         f"{sum(s['live'].values()) / MB:>10.1f}")
+
+        for s in self.stages:
+            if s['sites'] or s['live']:
+                lines.append(f"\n[{s['stage']}]")
+            for site, size in s['sites']:
+                lines.append(f"  retiene {size / MB:8.1f} MB  {site}")
+            for name, size in sorted(s['live'].items(), key=lambda item: -item[1]):
+                lines.append(f"  vivo    {size / MB:8.1f} MB  {name}")
+
+        if self.stages:
+            worst = max(self.stages, key=lambda s: s['total_peak'])
+            lines.append(f"\nPico máximo: {worst['total_peak'] / MB:.1f} MB (etapa '{worst['stage']}')")
+            lines.append("Los picos incluyen lo que asignaron otros hilos del proceso durante la medición")
+            if self.samples:
+                minutes = self.samples / self.sr / 60
+                lines.append(f"Por minuto de audio: {worst['total_peak'] / MB / minutes:.1f} MB "
+                             f"({self.samples} muestras a {self.sr} Hz)")
+        return '\n'.join(lines)
+
+
+def render_result(result, sr):
+    """
+    Dibuja los gráficos principales del resultado (FFT y espectrogramas) en
+    PNG, sin pyplot, para medir el costo de la etapa de gráficos.
+    """
+    from matplotlib.figure import Figure
+
+    freqs, mag_orig_db, mag_filt_db = result['fft']
+    times, freqs_spec, Sxx_orig_db, Sxx_filt_db = result['spectrogram']
+    half = len(freqs) // 2
+
+    images = []
+    fig = Figure(figsize=(14, 6))
+    ax = fig.subplots()
+    ax.plot(freqs[1:half], mag_orig_db[1:half])
+    ax.plot(freqs[1:half], mag_filt_db[1:half])
+    images.append(BytesIO())
+    fig.savefig(images[-1], format='png')
+
+    visible = freqs_spec <= 10000
+    fig = Figure(figsize=(14, 10))
+    axes = fig.subplots(2, 1)
+    for ax, Sxx_db in zip(axes, (Sxx_orig_db, Sxx_filt_db)):
+        ax.pcolormesh(times, freqs_spec[visible], Sxx_db[visible], shading='gouraud')
+    images.append(BytesIO())
+    fig.savefig(images[-1], format='png')
+    return images
+
+
+def profile_pipeline(source, filter_type, cutoffs, num_taps=101, start=None, end=None,
+                     format=None, profiler=None, render=True):
+    """
+    Ejecuta el análisis completo de la app sin cachés, midiendo cada etapa.
+
+    Parámetros:
+    -----------
+    - source (str, bytes o archivo binario): Audio a analizar
+    - filter_type (str): 'lowpass', 'highpass', 'bandpass' o 'bandstop'
+    - cutoffs (tuple): Frecuencias de corte en Hz
+    - num_taps (int): Longitud del filtro
+    - start, end (float, optional): Fragmento a analizar, en segundos
+    - format (str, optional): Formato del audio. Default: según la extensión
+    - profiler (MemoryProfiler, optional): Perfil donde registrar. Default: uno nuevo
+    - render (bool): Medir también los gráficos. Default: True
+
+    Retorna:
+    --------
+    - profiler (MemoryProfiler): Perfil con una entrada por etapa
+    """
+    from .audio_io import load_segment, trim_margins
+    from .analysis import calculate_fft, compute_spectrograms_batch
+    from .filters import apply_filter_segment, design_filter
+    from .pipeline import NPERSEG, NOVERLAP, F_MAX
+
+    profiler = profiler or MemoryProfiler()
+    # De a uno por proceso: reset_peak de un perfil alteraría los picos del otro
+    with PROFILE_LOCK:
+        profiler.start()
+        try:
+            with profiler.stage('decodificación'):
+                y_context, sr, margins = load_segment(source, start, end, margin=num_taps // 2, format=format)
+                y = profiler.track('y', trim_margins(y_context, margins))
+            profiler.set_signal(len(y), sr)
+
+            with profiler.stage('diseño'):
+                h = profiler.track('h', design_filter(filter_type, cutoffs, sr, num_taps))
+
+            with profiler.stage('filtrado'):
+                y_filtered = profiler.track('y_filtered', apply_filter_segment(y_context, h, margins))
+
+            with profiler.stage('fft'):
+                freqs, mag_orig, mag_orig_db = profiler.track('fft original', calculate_fft(y, sr, F_MAX))
+                _, mag_filt, mag_filt_db = profiler.track('fft filtrada', calculate_fft(y_filtered, sr, F_MAX))
+
+            with profiler.stage('stft'):
+                stacked = profiler.track('señales apiladas', np.stack([y, y_filtered]))
+                times, freqs_spec, _, Sxx_db = profiler.track('espectrogramas', compute_spectrograms_batch(
+                    stacked, sr, NPERSEG, NOVERLAP, keep_power=False, f_max=F_MAX))
+                del stacked
+
+            if render:
+                result = {'fft': (freqs, mag_orig_db, mag_filt_db),
+                          'spectrogram': (times, freqs_spec, Sxx_db[0], Sxx_db[1])}
+                with profiler.stage('gráficos'):
+                    profiler.track('imágenes', render_result(result, sr))
+        finally:
+            profiler.stop()
+    return profiler
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Perfil de memoria del análisis completo")
+    parser.add_argument('file')
+    parser.add_argument('--filter', default='lowpass',
+                        choices=('lowpass', 'highpass', 'bandpass', 'bandstop'))
+    parser.add_argument('--fc', type=float, nargs='+', default=[3000.0],
+                        help='Frecuencia de corte (dos valores para bandpass/bandstop)')
+    parser.add_argument('--num-taps', type=int, default=101)
+    parser.add_argument('--start', type=float)
+    parser.add_argument('--end', type=float)
+    parser.add_argument('--no-render', action='store_true', help='No medir los gráficos')
+    args = parser.parse_args()
+
+    profiler = profile_pipeline(args.file, args.filter, tuple(args.fc), args.num_taps,
+                                args.start, args.end, render=not args.no_render)
+    print(profiler.report())
@@ -0,0 +1,429 @@
+"""
+Estadísticas de control de calidad (pico, RMS, factor de cresta, energía por
+banda y sonoridad de corto plazo en LUFS según ITU-R BS.1770) calculadas por
+bloques en una sola pasada.
+
+Los acumuladores se pueden combinar (merge): cada fragmento del archivo se
+procesa por separado, incluso en paralelo, y los resultados parciales se suman.
+
+Uso desde la terminal:
+    python -m src.stats audio.wav --filter lowpass --fc 3000 --chunks 4
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import soundfile as sf
+from scipy import signal as scipy_signal
+
+from .audio_io import iter_blocks, load_segment, segment_bounds, trim_margins
+from .filters import design_filter, stream_filter, apply_filter_segment
+
+# (nombre, frecuencia inferior, frecuencia superior); None = hasta Nyquist
+DEFAULT_BANDS = (
+    ('graves', 20, 250),
+    ('medios', 250, 2000),
+    ('medios-agudos', 2000, 6000),
+    ('agudos', 6000, None),
+)
+
+
+# Contexto previo con el que cada fragmento en paralelo inicializa el estado de
+# la ponderación K: sus polos decaen en pocos milisegundos, así que en 0.5 s el
+# estado coincide con el de recorrer la señal de corrido
+K_PREROLL_SECONDS = 0.5
+
+
+def k_weighting(sr):
+    """
+    Filtro de ponderación K de ITU-R BS.1770 (estante de agudos + pasa altos)
+    para la frecuencia de muestreo dada, como secciones de segundo orden.
+    A 48 kHz coincide con los coeficientes de la norma.
+
+    Retorna:
+    --------
+    - sos (ndarray): Secciones para scipy.signal.sosfilt, forma (2, 6)
+    """
+    # Estante de agudos (~+4 dB por encima de ~1.7 kHz)
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = np.tan(np.pi * f0 / sr)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = [(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+             1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+
+    # Pasa altos (RLB) en ~38 Hz
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = np.tan(np.pi * f0 / sr)
+    a0 = 1 + k / q + k * k
+    highpass = [1.0, -2.0, 1.0, 1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+    return np.array([shelf, highpass])
+
+
+def _db(power):
+    """Potencia a dB relativos a fondo de escala (sin -inf para silencio)."""
+    return 10 * np.log10(np.maximum(power, 1e-20))
+
+
+class SignalStats:
+    """
+    Acumulador de estadísticas de una señal, alimentado por bloques.
+
+    Solo guarda sumas: la energía total, el pico, la energía por banda y la
+    energía con ponderación K de cada trama de frame_seconds (para la
+    sonoridad en el tiempo). Las tramas se indexan por la posición absoluta de
+    la muestra, así que los bloques de fragmentos distintos se pueden combinar
+    con merge aunque no estén alineados a las tramas.
+
+    La ponderación K es un filtro IIR: su estado pasa de un bloque al
+    siguiente, así que los bloques de un mismo acumulador deben ser
+    consecutivos. Un fragmento que no empieza al inicio del análisis se
+    inicializa con prime() sobre las muestras anteriores (ver chunk_stats).
+
+    La energía por banda se calcula con la FFT de cada trama completa con
+    ventana de Hann (sin ventana, la fuga espectral limitaría la atenuación
+    visible a unos 35-40 dB). Las tramas empiezan en posiciones absolutas,
+    así que la ventana cae siempre sobre las mismas muestras. Las tramas que quedan partidas entre bloques o fragmentos se
+    guardan aparte hasta completarse (también al combinar con merge), así que
+    ninguna estadística depende de cómo se divida la señal.
+
+    Parámetros:
+    -----------
+    - sr (int): Frecuencia de muestreo
+    - bands (tuple): Bandas (nombre, f_min, f_max) en Hz. Default: DEFAULT_BANDS
+    - frame_seconds (float): Resolución temporal de la sonoridad. Default: 0.1
+    """
+
+    def __init__(self, sr, bands=DEFAULT_BANDS, frame_seconds=0.1):
+        self.sr = sr
+        self.bands = tuple(bands)
+        self.frame_len = max(1, int(round(frame_seconds * sr)))
+        self.count = 0
+        self.peak = 0.0
+        self.sum_sq = 0.0
+        self.band_energy = np.zeros(len(self.bands))
+        self._window = scipy_signal.get_window('hann', self.frame_len)
+        self._k_sos = k_weighting(sr)
+        self._k_state = np.zeros((len(self._k_sos), 2))
+        self._frame_k_sq = np.zeros(0)
+        self._frame_count = np.zeros(0, dtype=np.int64)
+        self._partial = {}
+        self._next = 0
+
+    def update(self, block, offset=None):
+        """
+        Agrega un bloque de muestras.
+
+        Parámetros:
+        -----------
+        - block (ndarray): Muestras del bloque
+        - offset (int, optional): Posición de la primera muestra en la señal.
+          Default: a continuación del bloque anterior
+        """
+        block = np.asarray(block, dtype=np.float64)
+        if offset is None:
+            offset = self._next
+        self._next = offset + len(block)
+        if len(block) == 0:
+            return self
+
+        squared = np.square(block)
+        self.count += len(block)
+        self.peak = max(self.peak, float(np.max(np.abs(block))))
+        self.sum_sq += float(squared.sum())
+        self._add_band_frames(block, offset)
+
+        weighted, self._k_state = scipy_signal.sosfilt(self._k_sos, block, zi=self._k_state)
+        first = offset // self.frame_len
+        frame = (offset + np.arange(len(block))) // self.frame_len - first
+        self._add_frames(first, np.bincount(frame, weights=np.square(weighted)), np.bincount(frame))
+        return self
+
+    def prime(self, samples):
+        """
+        Pasa samples por la ponderación K sin contarlos en las estadísticas:
+        deja el estado del filtro como si la señal se hubiera recorrido desde
+        antes. Las muestras deben ser las inmediatamente anteriores al primer
+        bloque de update.
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        if len(samples):
+            _, self._k_state = scipy_signal.sosfilt(self._k_sos, samples, zi=self._k_state)
+        return self
+
+    def merge(self, other):
+        """Combina en este acumulador las estadísticas de otro fragmento de la misma señal."""
+        if (other.sr, other.bands, other.frame_len) != (self.sr, self.bands, self.frame_len):
+            raise ValueError("Solo se pueden combinar estadísticas con la misma configuración")
+        self.count += other.count
+        self.peak = max(self.peak, other.peak)
+        self.sum_sq += other.sum_sq
+        self.band_energy += other.band_energy
+        for index, (samples, count) in other._partial.items():
+            self._add_partial(index, 0, samples, count)
+        self._add_frames(0, other._frame_k_sq, other._frame_count)
+        self._next = max(self._next, other._next)
+        return self
+
+    def _add_frames(self, first, frame_k_sq, frame_count):
+        end = first + len(frame_k_sq)
+        if end > len(self._frame_k_sq):
+            grow = end - len(self._frame_k_sq)
+            self._frame_k_sq = np.concatenate([self._frame_k_sq, np.zeros(grow)])
+            self._frame_count = np.concatenate([self._frame_count, np.zeros(grow, dtype=np.int64)])
+        self._frame_k_sq[first:end] += frame_k_sq
+        self._frame_count[first:end] += frame_count
+
+    def _add_band_frames(self, block, offset):
+        """Suma la energía por banda de las tramas completas del bloque y guarda las partidas."""
+        n = self.frame_len
+        end = offset + len(block)
+        first_full, end_full = -(-offset // n), end // n
+        if end_full > first_full:
+            start = first_full * n - offset
+            frames = block[start:start + (end_full - first_full) * n].reshape(-1, n)
+            self.band_energy += self._band_energy(frames).sum(axis=0)
+        # Las puntas del bloque que no completan una trama
+        for index in {offset // n, (end - 1) // n}:
+            if not first_full <= index < end_full:
+                lo, hi = max(offset, index * n), min(end, (index + 1) * n)
+                self._add_partial(index, lo - index * n, block[lo - offset:hi - offset])
+
+    def _add_partial(self, index, position, samples, count=None):
+        """Agrega muestras a una trama incompleta; al completarse se suma a band_energy."""
+        frame = self._partial.setdefault(index, [np.zeros(self.frame_len), 0])
+        frame[0][position:position + len(samples)] += samples
+        frame[1] += len(samples) if count is None else count
+        if frame[1] == self.frame_len:
+            self.band_energy += self._band_energy(frame[0][np.newaxis])[0]
+            del self._partial[index]
+
+    def _band_energy(self, frames):
+        """
+        Energía de cada trama en cada banda. Con la normalización por la
+        potencia de la ventana, sumando todas las bandas se obtiene en
+        promedio la energía (suma de cuadrados) de la trama.
+        """
+        n = frames.shape[-1]
+        power = np.abs(np.fft.rfft(frames * self._window, axis=-1)) ** 2 / np.sum(self._window ** 2)
+        # Los bins intermedios representan también las frecuencias negativas
+        power[:, 1:(n + 1) // 2] *= 2
+        cumulative = np.concatenate([np.zeros((len(frames), 1)), np.cumsum(power, axis=-1)], axis=-1)
+        freqs = np.fft.rfftfreq(n, 1 / self.sr)
+        lo = np.searchsorted(freqs, [b[1] for b in self.bands])
+        hi = np.searchsorted(freqs, [np.inf if b[2] is None else b[2] for b in self.bands])
+        return cumulative[:, hi] - cumulative[:, lo]
+
+    @property
+    def band_totals(self):
+        """Energía por banda, incluyendo las tramas que quedaron incompletas (bordes de la señal)."""
+        totals = self.band_energy.copy()
+        if self._partial:
+            totals += self._band_energy(np.array([samples for samples, _ in self._partial.values()])).sum(axis=0)
+        return totals
+
+    @property
+    def rms(self):
+        return np.sqrt(self.sum_sq / self.count) if self.count else 0.0
+
+    def short_term_loudness(self, window_seconds=3.0):
+        """
+        Sonoridad de corto plazo según ITU-R BS.1770 (canal único, sin
+        compuerta): energía media con ponderación K en una ventana deslizante
+        que termina en cada trama, -0.691 + 10·log10(media), en LUFS.
+
+        Solo se informan ventanas completas: las primeras tramas no tienen
+        todavía window_seconds de señal detrás, y una ventana más corta
+        mediría otra cosa (y dependería de dónde empieza el fragmento). Si la
+        señal entera es más corta que la ventana, se informa un único valor
+        sobre toda la señal.
+
+        Parámetros:
+        -----------
+        - window_seconds (float): Duración de la ventana. Default: 3.0 (la
+          ventana de corto plazo de la norma)
+
+        Retorna:
+        --------
+        - times (ndarray): Fin de cada ventana, en segundos
+        - loudness_lufs (ndarray): Sonoridad de cada ventana en LUFS
+        """
+        width = max(1, int(round(window_seconds * self.sr / self.frame_len)))
+        sq = np.concatenate([[0.0], np.cumsum(self._frame_k_sq)])
+        counts = np.concatenate([[0], np.cumsum(self._frame_count)])
+        end = np.arange(1, len(sq))
+        start = np.maximum(end - width, 0)
+        window_sq = sq[end] - sq[start]
+        window_count = counts[end] - counts[start]
+
+        full = window_count >= width * self.frame_len
+        if not full.any():
+            if counts[-1] == 0:
+                return np.zeros(0), np.zeros(0)
+            return np.array([self._next / self.sr]), -0.691 + _db(np.array([sq[-1] / counts[-1]]))
+        times = np.minimum(end * self.frame_len, self._next) / self.sr
+        loudness = -0.691 + _db(window_sq[full] / window_count[full])
+        return times[full], loudness
+
+    def summary(self, window_seconds=3.0):
+        """
+        Resumen numérico para control de calidad.
+
+        Retorna:
+        --------
+        - summary (dict): duration, peak_db, rms_db, crest_factor_db,
+          loudness_max_lufs (corto plazo) y bands {nombre: dBFS}
+        """
+        _, loudness = self.short_term_loudness(window_seconds)
+        peak_db = float(_db(self.peak ** 2))
+        rms_db = float(_db(self.rms ** 2))
+        mean_band = self.band_totals / max(self.count, 1)
+        return {
+            'duration': self.count / self.sr,
+            'peak_db': peak_db,
+            'rms_db': rms_db,
+            'crest_factor_db': peak_db - rms_db,
+            'loudness_max_lufs': float(loudness.max()) if len(loudness) else float(-0.691 + _db(0)),
+            'bands': {name: float(e) for (name, _, _), e in zip(self.bands, _db(mean_band))},
+        }
+
+
+def stream_stats(source, filter_type, cutoffs, num_taps=101, start=None, end=None,
+                 format=None, blocksize=65536, bands=DEFAULT_BANDS):
+    """
+    Estadísticas de la señal original y filtrada en una sola pasada por
+    bloques: cada bloque leído se filtra (stream_filter) y ambos alimentan sus
+    acumuladores. No se mantiene en memoria ninguna de las dos señales completas.
+
+    Parámetros:
+    -----------
+    - source (str, bytes o archivo binario): Audio a analizar
+    - filter_type (str): 'lowpass', 'highpass', 'bandpass' o 'bandstop'
+    - cutoffs (tuple): Frecuencias de corte en Hz
+    - num_taps (int): Longitud del filtro
+    - start, end (float, optional): Fragmento a analizar, en segundos
+    - format (str, optional): Formato del audio. Default: según la extensión
+    - blocksize (int): Muestras por bloque. Default: 65536
+    - bands (tuple): Bandas de energía. Default: DEFAULT_BANDS
+
+    Retorna:
+    --------
+    - stats_orig (SignalStats): Estadísticas de la señal original
+    - stats_filt (SignalStats): Estadísticas de la señal filtrada
+    """
+    # El contexto a cada lado es la historia del filtro, como en process_audio
+    sr, blocks, margins = iter_blocks(source, blocksize, start, end, format, margin=num_taps // 2)
+    h = design_filter(filter_type, cutoffs, sr, num_taps)
+
+    stats_orig = SignalStats(sr, bands)
+    stats_filt = SignalStats(sr, bands)
+
+    def feed(blocks):
+        # El filtro recibe los bloques con contexto; la original, solo el fragmento
+        skip, after = margins
+        held = np.zeros(0, dtype=np.float32)
+        for block in blocks:
+            yield block
+            data = np.concatenate([held, block])[skip:]
+            skip = max(0, skip - len(held) - len(block))
+            keep = max(0, len(data) - after)
+            stats_orig.update(data[:keep])
+            held = data[keep:]
+
+    for block in stream_filter(feed(blocks), h, margins=margins):
+        stats_filt.update(block)
+    return stats_orig, stats_filt
+
+
+def chunk_stats(source, h, sr, a, b, bands=DEFAULT_BANDS, format=None, origin=0):
+    """
+    Estadísticas de las muestras [a, b) de la señal original y filtrada. El
+    fragmento se lee con el contexto que necesita el filtro, y con hasta
+    K_PREROLL_SECONDS previos (sin pasar de origin) para inicializar la
+    ponderación K, así que el resultado combinado de varios fragmentos
+    coincide con el del archivo entero.
+    Las posiciones se cuentan desde la muestra origin (el inicio del análisis).
+    """
+    preroll = min(a - origin, int(K_PREROLL_SECONDS * sr))
+    y_context, _, margins = load_segment(source, (a - preroll) / sr, b / sr, margin=len(h) // 2, format=format)
+    y_filtered = apply_filter_segment(y_context, h, margins)
+    y = trim_margins(y_context, margins)
+
+    stats = []
+    for signal in (y, y_filtered):
+        part = SignalStats(sr, bands).prime(signal[:preroll])
+        stats.append(part.update(signal[preroll:], a - origin))
+    return tuple(stats)
+
+
+def parallel_stats(path, filter_type, cutoffs, num_taps=101, start=None, end=None,
+                   chunks=4, max_workers=None, bands=DEFAULT_BANDS):
+    """
+    Igual que stream_stats, pero divide el fragmento en chunks partes que se
+    procesan en paralelo y combina los resultados parciales.
+
+    Parámetros:
+    -----------
+    - path (str): Ruta de un archivo que soundfile pueda leer (WAV, FLAC, OGG)
+    - chunks (int): Cantidad de partes. Default: 4
+    - max_workers (int, optional): Hilos. Default: min(chunks, núcleos)
+    - (resto): Ver stream_stats
+
+    Retorna:
+    --------
+    - stats_orig, stats_filt (SignalStats): Ver stream_stats
+    """
+    info = sf.info(path)
+    sr = info.samplerate
+    a, b = segment_bounds(info.frames, sr, start, end)
+    h = design_filter(filter_type, cutoffs, sr, num_taps)
+
+    # Sin partes vacías en fragmentos de menos de chunks muestras
+    chunks = min(chunks, b - a)
+    edges = np.linspace(a, b, chunks + 1).astype(int)
+    workers = max_workers or min(chunks, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(lambda i: chunk_stats(path, h, sr, edges[i], edges[i + 1], bands, origin=a),
+                              range(chunks)))
+
+    stats_orig, stats_filt = SignalStats(sr, bands), SignalStats(sr, bands)
+    for part_orig, part_filt in parts:
+        stats_orig.merge(part_orig)
+        stats_filt.merge(part_filt)
+    return stats_orig, stats_filt
+
+
+def print_summary(stats_orig, stats_filt):
+    """Imprime el resumen de la señal original y filtrada lado a lado."""
+    orig, filt = stats_orig.summary(), stats_filt.summary()
+    print(f"{'':<20}{'original':>10}{'filtrada':>10}")
+    for key, label in (('peak_db', 'Pico (dBFS)'), ('rms_db', 'RMS (dBFS)'),
+                       ('crest_factor_db', 'Factor de cresta (dB)'),
+                       ('loudness_max_lufs', 'Sonoridad máx. (LUFS)')):
+        print(f"{label:<20}{orig[key]:>10.2f}{filt[key]:>10.2f}")
+    for name in orig['bands']:
+        print(f"{'Banda ' + name:<20}{orig['bands'][name]:>10.2f}{filt['bands'][name]:>10.2f}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Estadísticas de control de calidad por archivo")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--filter', default='lowpass',
+                        choices=('lowpass', 'highpass', 'bandpass', 'bandstop'))
+    parser.add_argument('--fc', type=float, nargs='+', default=[3000.0],
+                        help='Frecuencia de corte (dos valores para bandpass/bandstop)')
+    parser.add_argument('--num-taps', type=int, default=101)
+    parser.add_argument('--chunks', type=int, default=1,
+                        help='Partes procesadas en paralelo (1 = lectura por bloques)')
+    args = parser.parse_args()
+
+    for path in args.files:
+        print(f"\n{path}")
+        if args.chunks > 1:
+            stats = parallel_stats(path, args.filter, tuple(args.fc), args.num_taps, chunks=args.chunks)
+        else:
+            stats = stream_stats(path, args.filter, tuple(args.fc), args.num_taps)
+        print_summary(*stats)
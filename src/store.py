@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se sincronizan los hilos del proceso
+    fcntl = None
+
+
+# Nombres que el almacén crea en su directorio: una entrada por clave
+# (sha256 en hex) y sus directorios temporales '<clave>.tmp<pid>-<hilo>'
+_ENTRY_NAME = re.compile(r'[0-9a-f]{64}(\.tmp\d+-\d+)?')
+
+
+def store_key(*parts):
+    """
+    Genera un identificador estable a partir de las partes de la clave
+    (hash del audio, parámetros de diseño y de análisis).
+    """
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class AnalysisStore:
+    """
+    Almacén persistente de resultados en disco, direccionado por contenido.
+
+    Cada resultado se guarda como archivos .npy dentro de un directorio
+    propio y se vuelve a abrir con mmap_mode='r', de modo que recargar un
+    espectrograma grande no lo copia entero a memoria. Un índice JSON guarda
+    tamaño y último acceso para desalojar lo menos usado cuando se supera
+    max_bytes.
+
+    Varios procesos (por ejemplo main.py y la app) pueden compartir el mismo
+    directorio: el índice se lee y escribe con un lock de archivo (fcntl).
+    Los accesos de get() se acumulan en memoria y se escriben en el índice
+    en el siguiente put() o cada ACCESS_FLUSH_SECONDS, no en cada acierto.
+
+    Los valores pueden ser un ndarray, o un dict/tuple de ndarrays (un nivel
+    de tuplas dentro de un dict, como el resultado de run_analysis).
+
+    Parámetros:
+    -----------
+    - root (str): Directorio del almacén
+    - max_bytes (int): Tamaño máximo en disco
+
+    Solo se borran archivos que el propio almacén crea (entradas con nombre
+    de clave sha256, el índice y sus temporales): el resto del contenido de
+    root, si lo hay, no se toca.
+    """
+
+    INDEX = 'index.json'
+    LOCK = '.lock'
+    ACCESS_FLUSH_SECONDS = 30
+
+    def __init__(self, root, max_bytes=2 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._accessed = {}
+        self._last_flush = time.monotonic()
+        os.makedirs(root, exist_ok=True)
+
+    # ---- índice ----
+
+    @contextmanager
+    def _locked(self):
+        """Acceso exclusivo al índice entre hilos y entre procesos."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.root, self.LOCK), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.root, self.INDEX)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        tmp = os.path.join(self.root, self.INDEX + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp, os.path.join(self.root, self.INDEX))
+
+    def _flush_access(self, index):
+        """Pasa al índice los accesos acumulados por get()."""
+        for key, last_access in self._accessed.items():
+            if key in index:
+                index[key]['last_access'] = max(index[key]['last_access'], last_access)
+        self._accessed.clear()
+        self._last_flush = time.monotonic()
+
+    # ---- (de)serialización ----
+
+    @staticmethod
+    def _flatten(value):
+        """Convierte el valor en {nombre_de_archivo: array} y una descripción de su forma."""
+        if isinstance(value, np.ndarray):
+            return {'value': value}, 'array'
+        if isinstance(value, tuple):
+            return {f'value.{i}': v for i, v in enumerate(value)}, ['tuple', len(value)]
+        if isinstance(value, dict):
+            arrays, layout = {}, {}
+            for name, v in value.items():
+                if isinstance(v, tuple):
+                    arrays.update({f'{name}.{i}': np.asarray(x) for i, x in enumerate(v)})
+                    layout[name] = len(v)
+                else:
+                    arrays[name] = np.asarray(v)
+                    layout[name] = None
+            return arrays, ['dict', layout]
+        raise TypeError(f"Tipo de resultado no soportado: {type(value).__name__}")
+
+    @staticmethod
+    def _unflatten(arrays, layout):
+        if layout == 'array':
+            return arrays['value']
+        if layout[0] == 'tuple':
+            return tuple(arrays[f'value.{i}'] for i in range(layout[1]))
+        return {name: (arrays[name] if n is None else tuple(arrays[f'{name}.{i}'] for i in range(n)))
+                for name, n in layout[1].items()}
+
+    # ---- API ----
+
+    def get(self, key):
+        """Retorna el valor guardado (arrays memory-mapped) o None."""
+        with self._locked():
+            index = self._read_index()
+            entry = index.get(key)
+            if entry is None:
+                return None
+            path = os.path.join(self.root, key)
+            try:
+                arrays = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+                          for name in entry['names']}
+            except (OSError, ValueError):
+                # Entrada dañada o borrada a mano: se descarta
+                del index[key]
+                self._write_index(index)
+                shutil.rmtree(path, ignore_errors=True)
+                return None
+            self._accessed[key] = time.time()
+            if time.monotonic() - self._last_flush > self.ACCESS_FLUSH_SECONDS:
+                self._flush_access(index)
+                self._write_index(index)
+        return self._unflatten(arrays, entry['layout'])
+
+    def put(self, key, value):
+        """Guarda el valor en disco, desalojando lo menos usado si hace falta."""
+        arrays, layout = self._flatten(value)
+        size = sum(a.nbytes for a in arrays.values())
+        if size > self.max_bytes:
+            return
+
+        path = os.path.join(self.root, key)
+        tmp = path + f'.tmp{os.getpid()}-{threading.get_ident()}'
+        os.makedirs(tmp, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, name + '.npy'), array)
+
+        with self._locked():
+            index = self._read_index()
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp, path)
+            self._flush_access(index)
+            index[key] = {'names': list(arrays), 'layout': layout,
+                          'bytes': size, 'last_access': time.time()}
+            self._evict(index, keep=key)
+            self._write_index(index)
+
+    @staticmethod
+    def _is_entry(name):
+        """True si name es una entrada (o un temporal) creada por el almacén."""
+        return _ENTRY_NAME.fullmatch(name) is not None
+
+    def _evict(self, index, keep=None):
+        # Entradas que no figuran en el índice (por ejemplo, de un índice
+        # perdido) no se podrían desalojar nunca: se borran. Los temporales
+        # de un put() en curso en otro proceso llevan '.tmp' y se respetan
+        for name in os.listdir(self.root):
+            if name not in index and '.' not in name and self._is_entry(name):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+        total = sum(entry['bytes'] for entry in index.values())
+        for old_key in sorted(index, key=lambda k: index[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if old_key == keep:
+                continue
+            total -= index.pop(old_key)['bytes']
+            shutil.rmtree(os.path.join(self.root, old_key), ignore_errors=True)
+
+    def get_or_compute(self, key, compute):
+        """Retorna el valor guardado o lo calcula con compute(), lo guarda y lo retorna."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def size(self):
+        """Bytes ocupados según el índice."""
+        with self._locked():
+            return sum(entry['bytes'] for entry in self._read_index().values())
+
+    def clear(self):
+        with self._locked():
+            # El archivo de lock se conserva: otros procesos pueden estar esperándolo
+            index = self._read_index()
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name in index or self._is_entry(name):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif name in (self.INDEX, self.INDEX + '.tmp'):
+                    os.remove(path)
+            self._accessed.clear()
+
+
+def default_store():
+    """Almacén por defecto (MAA2_STORE_DIR / MAA2_STORE_MB)."""
+    root = os.environ.get('MAA2_STORE_DIR',
+                          os.path.join(os.path.expanduser('~'), '.cache', 'maa2', 'analisis'))
+    max_mb = int(os.environ.get('MAA2_STORE_MB', 2048))
+    return AnalysisStore(root, max_mb * 1024 ** 2)
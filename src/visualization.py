@@ -1,8 +1,10 @@
-import matplotlib.pyplot as plt
 import numpy as np
 
+# matplotlib se importa dentro de cada función para no pagar su costo al importar el módulo
+
 def plot_waveform(signal, sr, title="Forma de onda"):
     """Grafica la forma de onda de una señal."""
+    import matplotlib.pyplot as plt
     tiempo = np.linspace(0, len(signal)/sr, len(signal))
     
     plt.figure(figsize=(12, 4))
@@ -25,6 +27,7 @@ def plot_spectrum(frequencies, magnitude_db, fc=None, f_max=10000, title="Espect
     - fc (float, opcional): Frecuencia de corte para la marca
     - f_max (float): Frecuencia máxima a mostrar
     """
+    import matplotlib.pyplot as plt
     idx_max = np.where(frequencies >= f_max)[0][0]
     
     plt.figure(figsize=(12, 4))
@@ -55,6 +58,7 @@ def plot_comparison(frequencies, mag_original_db, mag_filtered_db, fc, f_max=500
     - fc (float): Frecuencia de corte
     - f_max (float): Frecuencia máxima a mostrar
     """
+    import matplotlib.pyplot as plt
     idx_max = np.where(frequencies >= f_max)[0][0]
     
     plt.figure(figsize=(12, 8))
@@ -101,6 +105,7 @@ def plot_filter_response(frequencies, magnitude_db, fc, f_max=5000):
     - fc (float): Frecuencia de corte
     - f_max (float): Frecuencia máxima a mostrar
     """
+    import matplotlib.pyplot as plt
     idx_max = np.where(frequencies >= f_max)[0][0]
     
     plt.figure(figsize=(12, 5))
@@ -120,6 +125,7 @@ def plot_filter_response(frequencies, magnitude_db, fc, f_max=5000):
 
 def plot_impulse_response(filter_coeffs, title="Respuesta al impulso"):
     """Grafica la respuesta al impulso de un filtro"""
+    import matplotlib.pyplot as plt
     n_taps = len(filter_coeffs)
     n = np.arange(n_taps)
     
@@ -161,18 +167,16 @@ def plot_filters_comparison(h_low, h_high, fc, sr):
     - fc (float): Frecuencia de corte en Hz
     - sr (float): Frecuencia de muestreo en Hz
     """
-    from .analysis import calculate_filter_response
+    import matplotlib.pyplot as plt
+    from .analysis import zoom_filter_response
     
     n_taps = len(h_low)
     n = np.arange(n_taps)
     center = n_taps // 2
     
-    # Calcular respuestas en frecuencia
-    freqs_low, mag_low_db = calculate_filter_response(h_low, sr)
-    freqs_high, mag_high_db = calculate_filter_response(h_high, sr)
-    
-    # Encontrar índice para limitar a 5kHz
-    idx_max = np.where(freqs_low >= 5000)[0][0]
+    # Calcular respuestas en frecuencia solo hasta 5kHz
+    freqs_low, mag_low_db = zoom_filter_response(h_low, sr, 0, 5000)
+    freqs_high, mag_high_db = zoom_filter_response(h_high, sr, 0, 5000)
     
     # Crear figura con 3 subplots
     fig = plt.figure(figsize=(14, 10))
@@ -201,9 +205,9 @@ def plot_filters_comparison(h_low, h_high, fc, sr):
     
     # 3. Respuestas en frecuencia superpuestas
     ax3 = fig.add_subplot(gs[2])
-    ax3.plot(freqs_low[1:idx_max], mag_low_db[1:idx_max], 
+    ax3.plot(freqs_low, mag_low_db, 
              linewidth=2, label='Paso bajo', alpha=0.8)
-    ax3.plot(freqs_high[1:idx_max], mag_high_db[1:idx_max], 
+    ax3.plot(freqs_high, mag_high_db, 
              linewidth=2, label='Paso alto', alpha=0.8)
     ax3.axvline(x=fc, color='red', linestyle='--', label=f'fc = {fc} Hz')
     ax3.axhline(y=-3, color='gray', linestyle=':', label='-3 dB', alpha=0.5)
@@ -231,6 +235,7 @@ def plot_audio_effects_comparison(freqs, mag_orig_db, mag_low_db, mag_high_db, f
     - fc (float): Frecuencia de corte en Hz
     - f_max (float): Frecuencia máxima a mostrar. Default: 5000
     """
+    import matplotlib.pyplot as plt
     idx_max = np.where(freqs >= f_max)[0][0]
     
     fig, axes = plt.subplots(2, 1, figsize=(14, 8))
@@ -280,6 +285,7 @@ def plot_spectrogram(times, frequencies, Sxx_db, title="Espectrograma", f_max=10
     - title (str): Título del gráfico
     - f_max (float): Frecuencia máxima a mostrar
     """
+    import matplotlib.pyplot as plt
     # Limitar a f_max
     idx_freq = np.where(frequencies <= f_max)[0]
     
@@ -309,6 +315,7 @@ def plot_spectrograms_comparison(times, frequencies, Sxx_orig_db, Sxx_low_db,
     - fc (float): Frecuencia de corte
     - f_max (float): Frecuencia máxima a mostrar
     """
+    import matplotlib.pyplot as plt
     # Limitar a f_max
     idx_freq = np.where(frequencies <= f_max)[0]
     